@@ -1,9 +1,13 @@
 from visuals.text_button import StateChangerButton,\
     NumberInput, Position, TextTile
 from visuals.colours import Colour, OLIVE, PINK, WHITE, BLACK, GRAY
+from visuals.camera import Camera
+from visuals.grid_drawing import draw_grid, render_clue_surfaces
 from slitherlinking.slitherlink_internal_state import Slitherlink
-from pygame.font import SysFont
-from typing import Sequence, Union
+from slitherlinking.edit_journal import EditJournal, CorruptJournal,\
+    restore_puzzle, set_aside_session
+from typing import Optional, Sequence, Union
+import os
 import pygame
 
 
@@ -14,10 +18,19 @@ class AppControl:
         self.mouse_left_clicked = False
         self.pressed_key_event = pygame.NOEVENT
         self.fps = 60
+        self.idle_timeout = 1000  # Longest nap (ms) while nothing happens.
+        self.interaction_grace = 500  # How long (ms) the full fps lingers.
+        self.last_interaction = -self.interaction_grace
+        self.needs_redraw = True
         self.state: ButtonStateHandler = STATE_DICT[starting_state]
         self.clock = pygame.time.Clock()
         self.grid_width, self.grid_height = 8, 8
 
+    def is_interacting(self) -> bool:
+        """True shortly after any input, then the loop goes to sleep."""
+        since_input = pygame.time.get_ticks() - self.last_interaction
+        return since_input < self.interaction_grace
+
     def app_state_update(self):
         """Pushes states further upon choosing."""
         self.state.cleanup()  # Any necessary work to close the state.
@@ -29,25 +42,42 @@ class AppControl:
             self.game_running = False
 
         self.state.startup()  # Any necessary work to open up the state.
+        self.needs_redraw = True
 
     def event_loop(self):
         """Basis for all application events."""
         self.mouse_left_clicked = False
         self.pressed_key_event = pygame.NOEVENT
-        for event in pygame.event.get():
+        if self.is_interacting():
+            events = pygame.event.get()
+        else:  # Block until something happens, no CPU burnt meanwhile.
+            first_event = pygame.event.wait(self.idle_timeout)
+            events = [] if first_event.type == pygame.NOEVENT else\
+                [first_event, *pygame.event.get()]
+        if events:
+            # All the widget updates happen while drawing, so any event
+            # means the screen may be stale.
+            self.last_interaction = pygame.time.get_ticks()
+            self.needs_redraw = True
+        for event in events:
             if event.type == pygame.QUIT:
                 self.game_running = False
             if event.type == pygame.MOUSEBUTTONDOWN:
                 self.state.process_specific_events(event)
                 if event.button == 1:
                     self.mouse_left_clicked = True
+            if event.type in {pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION,
+                              pygame.MOUSEWHEEL}:
+                self.state.process_specific_events(event)
             if event.type == pygame.KEYDOWN:
                 self.pressed_key_event = event
 
     def main_game_loop(self):
-        """Handles the main game loop. Duh."""
+        """Handles the main game loop. Duh. Runs at full fps only
+        while the user interacts, otherwise it sleeps until an event."""
         while self.game_running:
-            self.clock.tick(self.fps)
+            if self.is_interacting():
+                self.clock.tick(self.fps)
             self.event_loop()
             if self.mouse_left_clicked:
                 new_state = self.state.update_menu(pygame.mouse.get_pos())
@@ -55,6 +85,9 @@ class AppControl:
                 if self.state.next_state_to_move_to:
                     self.app_state_update()
                     continue
+            if not self.needs_redraw:
+                continue
+            self.needs_redraw = False
             self.state.draw_visible_objects(SCREEN)
 
             # Possibly draw some other stuffs after.
@@ -132,13 +165,12 @@ class GamePlay(ButtonStateHandler):
     def __init__(self):
         # Just placeholders for now, to not declare outside of __init__.
         self.grid_state = Slitherlink(1, 1)
-        self.outline_rect = pygame.Rect(25, 25, 0, 0)
-        self.corner_rectangles: list[pygame.Rect] = []
-        self.edges: list[tuple[int, int, pygame.Rect]] = []
-        self.cell_rectangles: list[tuple[int, int, pygame.Rect]] = []
-        self.x_rectangles: dict[tuple[int, int], pygame.Rect] = {}
-        self.number_font = SysFont("palatinolinotype", 1)
-        self.edge_x = self.number_font.render("x", True, BLACK, WHITE)
+        self.journal: Optional[EditJournal] = None
+        self.camera = Camera(pygame.Rect(25, 25, 0, 0), 1, 1)
+        self.rendered_zoom = 0  # The thin size the surfaces below are for.
+        self.number_surfaces: dict[int, pygame.Surface] = {}
+        self.edge_x = pygame.Surface((1, 1))
+        self.is_panning = False
         self.editor_mode = True
         self.editor_switcher = pygame.Rect(1600, 100, 60, 60)
 
@@ -149,6 +181,27 @@ class GamePlay(ButtonStateHandler):
         super().__init__(self.state_buttons, self.input_tiles, self.background)
 
     def startup(self):
+        # Sessions are discarded when the editor is left normally, so one
+        # is found only if the editor crashed, and then it comes back.
+        session = os.path.join(SESSION_DIRECTORY,
+                               f"editor_{GAME.grid_width}x{GAME.grid_height}")
+        try:
+            restored = restore_puzzle(session)
+        except CorruptJournal:
+            set_aside_session(session)  # Kept for inspection, not reused.
+            restored = None
+        if restored is None:
+            self.create_new_grid()
+        else:
+            self.grid_state = restored
+        self.journal = EditJournal(session, self.grid_state)
+        # The camera does all the grid and cell size calculations.
+        viewport = pygame.Rect(THE_CORNER, (SLITHERLINK_MAX_WIDTH,
+                                            SLITHERLINK_MAX_HEIGHT))
+        self.camera = Camera(viewport, GAME.grid_width, GAME.grid_height)
+        self.is_panning = False
+
+    def create_new_grid(self):
         self.grid_state = Slitherlink(GAME.grid_width, GAME.grid_height)
         self.grid_state.change_line_segment(1, 2, 12)
         self.grid_state.change_line_segment(1, 4, 24)
@@ -167,149 +220,74 @@ class GamePlay(ButtonStateHandler):
         self.grid_state.change_number(3, 1, 2)
         self.grid_state.change_number(5, 6, 3)
         self.grid_state.change_number(8, 8, 0)
-        # We need to calculate some grid and cell sizes.
-        number_of_tiny_columns = 3 + 7 * GAME.grid_width
-        maximum_column_size = SLITHERLINK_MAX_WIDTH // number_of_tiny_columns
-        number_of_tiny_rows = 3 + 7 * GAME.grid_height
-        maximum_row_size = SLITHERLINK_MAX_HEIGHT // number_of_tiny_rows
-        thin_size = min(10, maximum_row_size, maximum_column_size)
-        cell_size = 6 * thin_size  # This is why the 7* was present.
-        size_together = thin_size + cell_size
-        total_width = number_of_tiny_columns * thin_size
-        total_height = number_of_tiny_rows * thin_size
-        self.number_font = SysFont("palatinolinotype", cell_size)
-        x_font = SysFont("palatinolinotype", cell_size // 2)
-        self.edge_x = x_font.render("x", True, BLACK, WHITE)
-        cross_h, cross_w = self.edge_x.get_height(), self.edge_x.get_width()
-        horizontal_thin_offset_x: int = (cross_h - thin_size) // 2
-        horizontal_thick_offset_x: int = (cell_size - cross_w) // 2
-        vertical_thick_offset_x: int = (cell_size - cross_h) // 2
-        vertical_thin_offset_x: int = (cross_w - thin_size) // 2
-
-        # First we reset the rectangle memory:
-        the_x, the_y = THE_CORNER
-        self.outline_rect = pygame.Rect(the_x, the_y, total_width, total_height)
-        self.corner_rectangles = []
-        self.edges = []
-        self.cell_rectangles = []
-        self.x_rectangles = {}
-        # Having done that, let's precompute the relevant rectangles.
-        # First go the corners:
-        for index_y in range(GAME.grid_height + 1):
-            new_corner = [the_x + thin_size,
-                          the_y + thin_size + index_y * size_together]
-            for _ in range(GAME.grid_width + 1):
-                x_cor, y_cor = new_corner
-                new_rect = pygame.Rect(x_cor, y_cor, thin_size, thin_size)
-                self.corner_rectangles.append(new_rect)
-                new_corner[0] += size_together
-        # Secondly, the horizontal edge segments:
-        horizontal_edges: list[tuple[int, int, pygame.Rect]] = []
-        for index_y in range(GAME.grid_height + 1):
-            y_base = the_y + thin_size + index_y * size_together
-            new_corner = [the_x + 2 * thin_size, y_base]
-            cross_corner = [the_x + 2 * thin_size + horizontal_thick_offset_x,
-                            y_base - horizontal_thin_offset_x]
-            state_y = 2 * index_y + 1
-            state_x = 2
-            for _ in range(GAME.grid_width):
-                x_cor, y_cor = new_corner
-                new_rect = pygame.Rect(x_cor, y_cor, cell_size, thin_size)
-                horizontal_edges.append((state_y, state_x, new_rect))
-                # We also have to stash the rectangles for X's.
-                x_cor, y_cor = cross_corner
-                x_rect = pygame.Rect(x_cor, y_cor, cross_w, cross_h)
-                self.x_rectangles[(state_y, state_x)] = x_rect
-                new_corner[0] += size_together
-                cross_corner[0] += size_together
-                state_x += 2
-        # Next go the vertical edge segments:
-        vertical_edges: list[tuple[int, int, pygame.Rect]] = []
-        for index_x in range(GAME.grid_height + 1):
-            x_base = the_x + thin_size + index_x * size_together
-            new_corner = [the_x + thin_size + index_x * size_together,
-                          the_y + 2 * thin_size]
-            cross_corner = [x_base - vertical_thin_offset_x,
-                            the_y + 2 * thin_size + vertical_thick_offset_x]
-            state_x = 2 * index_x + 1
-            state_y = 2
-            for _ in range(GAME.grid_width):
-                x_cor, y_cor = new_corner
-                new_rect = pygame.Rect(x_cor, y_cor, thin_size, cell_size)
-                vertical_edges.append((state_y, state_x, new_rect))
-                # We also have to stash the rectangles for X's.
-                x_cor, y_cor = cross_corner
-                x_rect = pygame.Rect(x_cor, y_cor, cross_w, cross_h)
-                self.x_rectangles[(state_y, state_x)] = x_rect
-                new_corner[1] += size_together
-                cross_corner[1] += size_together
-                state_y += 2
-        self.edges = vertical_edges + horizontal_edges
-        # Finally, we make the number cell rectangles:
-        for index_y in range(GAME.grid_height):
-            new_corner = [the_x + 2 * thin_size,
-                          the_y + 2 * thin_size + index_y * size_together]
-            state_y = 2 * index_y + 2
-            state_x = 2
-            for index_x in range(1, GAME.grid_width + 1):
-                x_cor, y_cor = new_corner
-                new_rect = pygame.Rect(x_cor, y_cor, cell_size, cell_size)
-                self.cell_rectangles.append((state_y, state_x, new_rect))
-                new_corner[0] += size_together
-                state_x += 2
+
+    def cleanup(self):
+        if self.journal is not None:
+            self.journal.discard()  # A clean exit, no crash to recover from.
+            self.journal = None
+
+    def render_zoom_surfaces(self):
+        """Re-renders the numbers and the X, only when the zoom changed."""
+        if self.rendered_zoom == self.camera.thin_size:
+            return
+        self.rendered_zoom = self.camera.thin_size
+        numbers, self.edge_x = render_clue_surfaces(self.camera.cell_size,
+                                                    PINK)
+        self.number_surfaces = {number: surface.convert_alpha()
+                                for number, surface in numbers.items()}
 
     def draw_state_specific_objects(self, screen):
-        """Draws the slitherlink grid. That's why we're here!"""
+        """Draws the visible part of the slitherlink grid.
+        That's why we're here!"""
         if self.editor_mode:
             pygame.draw.rect(screen, BLACK, self.editor_switcher)
         else:
             pygame.draw.rect(screen, WHITE, self.editor_switcher)
-        pygame.draw.rect(screen, WHITE, self.outline_rect)
-        for rect in self.corner_rectangles:
-            pygame.draw.rect(screen, BLACK, rect)
-        for y, x, orthogonal_edge_rect in self.edges:
-            if self.grid_state.state_of_grid[y][x] == 24:
-                x_rect = self.x_rectangles[(y, x)]
-                screen.blit(self.edge_x, x_rect)
-                continue
-            edge_is_lined = self.grid_state.state_of_grid[y][x] == 12
-            colour = GRAY if edge_is_lined else WHITE
-            pygame.draw.rect(screen, colour, orthogonal_edge_rect)
-        for y, x, grid_cell in self.cell_rectangles:
-            if (number := self.grid_state.state_of_grid[y][x]) in {0, 1, 2, 3}:
-                text = str(number)
-                surface = self.number_font.render(text, True, BLACK, PINK)
-                surface = surface.convert_alpha()
-                vertical_pad = (grid_cell.h - surface.get_height()) // 2
-                horizontal_pad = (grid_cell.w - surface.get_width()) // 2
-                number_corner = (grid_cell.x + horizontal_pad,
-                                 grid_cell.y + vertical_pad)
-                screen.blit(surface, number_corner)
+        self.render_zoom_surfaces()
+        draw_grid(screen, self.camera, self.grid_state.state_of_grid,
+                  self.number_surfaces, self.edge_x, GRAY)
 
     def process_specific_events(self, event):
-        """More specifically, processes the clicks."""
+        """More specifically, processes the clicks, zooming and panning."""
+        if event.type == pygame.MOUSEWHEEL:
+            self.camera.zoom(event.y, pygame.mouse.get_pos())
+            return
+        if event.type == pygame.MOUSEMOTION:
+            if self.is_panning:
+                self.camera.pan(*event.rel)
+            return
+        if event.type == pygame.MOUSEBUTTONUP:
+            if event.button == 2:
+                self.is_panning = False
+            return
+        if event.button == 2:  # Middle button drags the grid around.
+            self.is_panning = True
+            return
+        if event.button not in {1, 3}:  # Wheel clicks, handled above.
+            return
         click_x, click_y = pygame.mouse.get_pos()
         if self.editor_switcher.collidepoint(click_x, click_y):
             self.editor_mode = not self.editor_mode
-        if self.outline_rect.collidepoint(click_x, click_y):
-            # This means that the click needs further processing.
-            if event.button == 3:
-                number_shift = -1
-                number_to_put = 24
-            else:  # We shall regard *only* the right click as decrement.
-                number_shift = 1
-                number_to_put = 12
-            for y, x, rectangle in self.edges:
-                if rectangle.collidepoint(click_x, click_y):
-                    current_tile = self.grid_state.state_of_grid[y][x]
-                    new_tile = number_to_put if current_tile == 5 else 5
-                    self.grid_state.state_of_grid[y][x] = new_tile
-            if self.editor_mode:  # Otherwise numbers can't change.
-                for y, x, cell in self.cell_rectangles:
-                    if cell.collidepoint(click_x, click_y):
-                        current_number = self.grid_state.state_of_grid[y][x]
-                        new_number = (current_number + number_shift) % 5
-                        self.grid_state.state_of_grid[y][x] = new_number
+        if (tile := self.camera.tile_at((click_x, click_y))) is None:
+            return
+        # This means that the click needs further processing.
+        if event.button == 3:
+            number_shift = -1
+            number_to_put = 24
+        else:  # We shall regard *only* the right click as decrement.
+            number_shift = 1
+            number_to_put = 12
+        y, x = tile
+        current_tile = self.grid_state.state_of_grid[y][x]
+        if (y + x) % 2:  # An edge.
+            new_tile = number_to_put if current_tile == 5 else 5
+        elif y % 2 == 0 and self.editor_mode:  # Otherwise numbers can't change.
+            new_tile = (current_tile + number_shift) % 5
+        else:
+            return
+        self.grid_state.state_of_grid[y][x] = new_tile
+        if self.journal is not None:
+            self.journal.record(y, x, current_tile, new_tile)
 
 
 if __name__ == "__main__":
@@ -318,6 +296,9 @@ if __name__ == "__main__":
     # pygame.display.set_icon(pygame.image.load("hearts.png"))  To be added!
     SLITHERLINK_MAX_WIDTH, SLITHERLINK_MAX_HEIGHT = 1500, 880
     THE_CORNER = (25, 25)
+    # Edit journals, to survive crashes. Next to this script, not the CWD.
+    SESSION_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     "sessions")
     SCREEN = pygame.display.set_mode((1880, 900))
     Menu = MainMenu()
     back_to_menu = StateChangerButton((1600, 800), "<- Back to Main Menu", 36,
@@ -330,5 +311,6 @@ if __name__ == "__main__":
     }  # We don't include the quit, but instead use it as a KeyError exception.
     GAME = AppControl("main_menu")
     GAME.main_game_loop()
+    GAME.state.cleanup()  # E.g. the editor discards its journal.
     pygame.quit()
     raise SystemExit
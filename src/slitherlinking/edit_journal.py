@@ -0,0 +1,283 @@
+"""
+Crash-safe persistence of an editing session, a few bytes per edit.
+
+A session lives in a snapshot of the whole grid plus numbered journals,
+all next to the base path given:
+    <base>.snapshot          the grid, and the first journal still needed
+    <base>.journal.00000003  edits made after that snapshot, in order
+Every edit is appended to the current journal as 6 bytes (row, column,
+old value, new value). Edits are buffered and written with an fsync in
+batches, i.e. once batch_size of them pile up, or flush_interval seconds
+after the first unwritten one. Once the current journal grows past the
+compaction threshold, a new journal is started and a fresh snapshot is
+written in the background. The older journals are deleted only after
+the new snapshot safely replaced the old one, so a crash at any moment
+loses no more than the unwritten batch. A torn last record is ignored.
+A session meant to survive crashes only is discarded on a clean exit,
+and one that can't be read back is set aside rather than overwritten.
+"""
+from array import array
+from glob import glob
+from typing import BinaryIO, List, Optional
+import os
+import struct
+import threading
+from slitherlinking.slitherlink_internal_state import Slitherlink
+SNAPSHOT_HEADER = struct.Struct("<4sIHH")  # Magic, generation, size.
+JOURNAL_HEADER = struct.Struct("<4sHH")  # Magic, width, height.
+EDIT_RECORD = struct.Struct("<HHbb")  # Row, column, old, new.
+SNAPSHOT_MAGIC, JOURNAL_MAGIC = b"SLS1", b"SLJ1"
+
+
+class CorruptJournal(Exception):
+    """Raised when a snapshot or journal can't be read back."""
+
+
+def snapshot_path(base_path: str) -> str:
+    return f"{base_path}.snapshot"
+
+
+def journal_path(base_path: str, generation: int) -> str:
+    return f"{base_path}.journal.{generation:08d}"
+
+
+def journal_generations(base_path: str) -> List[int]:
+    """Generations of the journals on disk, oldest first."""
+    prefix = journal_path(base_path, 0)[:-8]
+    return sorted(int(path[len(prefix):]) for path in glob(prefix + "*")
+                  if path[len(prefix):].isdigit())
+
+
+def session_files(base_path: str) -> List[str]:
+    """The snapshot (if there is one) and the journals of a session."""
+    paths = [journal_path(base_path, generation)
+             for generation in journal_generations(base_path)]
+    if os.path.exists(snapshot_path(base_path)):
+        paths.insert(0, snapshot_path(base_path))
+    return paths
+
+
+def delete_session(base_path: str):
+    for path in session_files(base_path):
+        os.remove(path)
+    fsync_directory(os.path.dirname(base_path))
+
+
+def set_aside_session(base_path: str, suffix: str = ".corrupt") -> List[str]:
+    """
+    Renames the files of a session out of the way, e.g. of a corrupt one,
+    so that a new session can start at the same path.
+
+    :param base_path: The same path the EditJournal was given.
+    :param suffix: Appended to every file name, replacing older files.
+    :return: The new paths of the files.
+    """
+    moved = []
+    for path in session_files(base_path):
+        os.replace(path, path + suffix)
+        moved.append(path + suffix)
+    fsync_directory(os.path.dirname(base_path))
+    return moved
+
+
+def fsync_directory(directory: str):
+    """Makes renames and new files durable, where the OS allows that."""
+    try:
+        descriptor = os.open(directory or ".", os.O_RDONLY)
+    except OSError:
+        return  # E.g. Windows can't open directories.
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def write_snapshot(base_path: str, generation: int, width: int, height: int,
+                   state: List[List[int]]):
+    """Atomically replaces the snapshot, through a synced temporary file."""
+    flat = array("b", [tile for row in state for tile in row])
+    temporary = snapshot_path(base_path) + ".tmp"
+    with open(temporary, "wb") as snapshot:
+        snapshot.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, generation,
+                                            width, height))
+        snapshot.write(flat.tobytes())
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+    os.replace(temporary, snapshot_path(base_path))
+    fsync_directory(os.path.dirname(base_path))
+
+
+def restore_puzzle(base_path: str) -> Optional[Slitherlink]:
+    """
+    Rebuilds the grid from the snapshot and the journals after it.
+
+    :param base_path: The same path the EditJournal was given.
+    :return: The restored puzzle, None if there's no saved session.
+    """
+    try:
+        with open(snapshot_path(base_path), "rb") as snapshot:
+            data = snapshot.read()
+    except FileNotFoundError:
+        return None
+    if len(data) < SNAPSHOT_HEADER.size:
+        raise CorruptJournal("The snapshot is truncated.")
+    magic, generation, width, height = SNAPSHOT_HEADER.unpack_from(data)
+    # Checked before allocating, a garbage size could ask for gigabytes.
+    row_length = 2 * width + 3
+    if magic != SNAPSHOT_MAGIC or not (width and height) or\
+            len(data) - SNAPSHOT_HEADER.size != (2 * height + 3) * row_length:
+        raise CorruptJournal("The snapshot doesn't hold a grid.")
+    puzzle = Slitherlink(width, height)
+    flat = array("b", data[SNAPSHOT_HEADER.size:])
+    puzzle.state_of_grid = [flat[start:start + row_length].tolist()
+                            for start in range(0, len(flat), row_length)]
+    for journal_generation in journal_generations(base_path):
+        if journal_generation >= generation:
+            replay_journal(journal_path(base_path, journal_generation),
+                           puzzle)
+    return puzzle
+
+
+def replay_journal(path: str, puzzle: Slitherlink):
+    """Applies the edits of one journal, ignoring a torn last record."""
+    with open(path, "rb") as journal:
+        data = journal.read()
+    if len(data) < JOURNAL_HEADER.size:
+        return  # Crashed before even the header got written.
+    magic, width, height = JOURNAL_HEADER.unpack_from(data)
+    if magic != JOURNAL_MAGIC or (width, height) != (puzzle.width,
+                                                     puzzle.height):
+        raise CorruptJournal(f"{path} doesn't belong to {puzzle!r}.")
+    whole_records = (len(data) - JOURNAL_HEADER.size) // EDIT_RECORD.size
+    end = JOURNAL_HEADER.size + whole_records * EDIT_RECORD.size
+    records = data[JOURNAL_HEADER.size:end]
+    for y, x, _, new in EDIT_RECORD.iter_unpack(records):
+        if not (y <= puzzle.grid_height and x <= puzzle.grid_width):
+            raise CorruptJournal(f"{path} edits outside of the grid.")
+        puzzle.state_of_grid[y][x] = new
+
+
+class EditJournal:
+    def __init__(self, base_path: str, puzzle: Slitherlink,
+                 batch_size: int = 256, flush_interval: float = 1.0,
+                 compaction_threshold: int = 1 << 20):
+        """
+        Starts a session with a snapshot of the puzzle as it is now,
+        replacing any older session kept at the same path.
+
+        :param base_path: Where the files go, see the module docstring.
+        :param puzzle: The grid whose edits get recorded.
+        :param batch_size: Number of edits written together.
+        :param flush_interval: Longest wait (s) of an edit to be written.
+        :param compaction_threshold: Journal size (B) starting a compaction.
+        """
+        self.base_path = base_path
+        self.puzzle = puzzle
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compaction_threshold = compaction_threshold
+        self.lock = threading.Lock()
+        self.buffer = bytearray()
+        self.flush_timer: Optional[threading.Timer] = None
+        self.compaction: Optional[threading.Thread] = None
+        self.closed = False
+        os.makedirs(os.path.dirname(base_path) or ".", exist_ok=True)
+        older = journal_generations(base_path)
+        self.generation = older[-1] + 1 if older else 0
+        write_snapshot(base_path, self.generation, puzzle.width,
+                       puzzle.height, puzzle.state_of_grid)
+        self.delete_journals_before(self.generation)
+        self.journal_size = 0
+        self.journal = self.open_journal()
+
+    def open_journal(self) -> BinaryIO:
+        journal = open(journal_path(self.base_path, self.generation), "ab")
+        if journal.tell() == 0:  # Synced together with the first batch.
+            journal.write(JOURNAL_HEADER.pack(
+                JOURNAL_MAGIC, self.puzzle.width, self.puzzle.height
+            ))
+        self.journal_size = journal.tell()
+        return journal
+
+    def record(self, y: int, x: int, old: int, new: int):
+        """
+        Remembers an edit of state_of_grid[y][x], call it after the edit
+        got applied. The edit is written in the next batch.
+        """
+        assert not self.closed, "The journal is closed."
+        with self.lock:
+            self.buffer += EDIT_RECORD.pack(y, x, old, new)
+            unwritten = len(self.buffer) // EDIT_RECORD.size
+            if unwritten >= self.batch_size:
+                self.write_buffer()
+            elif self.flush_timer is None:
+                self.flush_timer = threading.Timer(self.flush_interval,
+                                                   self.flush)
+                self.flush_timer.start()
+            too_big = self.journal_size + len(self.buffer) >\
+                self.compaction_threshold
+        if too_big:
+            self.compact()
+
+    def write_buffer(self):
+        """Writes and syncs the buffered edits, the lock must be held."""
+        if self.flush_timer is not None:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+        if not self.buffer:
+            return
+        self.journal.write(self.buffer)
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.journal_size += len(self.buffer)
+        self.buffer.clear()
+
+    def flush(self):
+        """Writes and syncs all the edits recorded so far."""
+        with self.lock:
+            if not self.journal.closed:
+                self.write_buffer()
+
+    def compact(self):
+        """Starts a new journal and snapshots the grid in the background,
+        unless the previous compaction still runs."""
+        if self.compaction is not None and self.compaction.is_alive():
+            return
+        with self.lock:
+            self.write_buffer()
+            self.journal.close()
+            self.generation += 1
+            self.journal = self.open_journal()
+            fsync_directory(os.path.dirname(self.base_path))
+            # Copied here, the grid keeps changing while being written.
+            state = [row[:] for row in self.puzzle.state_of_grid]
+        self.compaction = threading.Thread(
+            target=self.write_compacted, args=(self.generation, state)
+        )
+        self.compaction.start()
+
+    def write_compacted(self, generation: int, state: List[List[int]]):
+        write_snapshot(self.base_path, generation, self.puzzle.width,
+                       self.puzzle.height, state)
+        self.delete_journals_before(generation)
+
+    def delete_journals_before(self, generation: int):
+        for older in journal_generations(self.base_path):
+            if older < generation:
+                os.remove(journal_path(self.base_path, older))
+
+    def close(self):
+        """Writes everything out and waits for a running compaction."""
+        if self.closed:
+            return
+        self.closed = True
+        with self.lock:
+            self.write_buffer()
+            self.journal.close()
+        if self.compaction is not None:
+            self.compaction.join()
+
+    def discard(self):
+        """Closes the journal and deletes the whole session from disk."""
+        self.close()
+        delete_session(self.base_path)
@@ -0,0 +1,260 @@
+"""
+A local asyncio server which hands out pre-generated puzzles.
+
+It speaks JSON lines over TCP, one request object per line and exactly
+one response object per line back:
+    {"width": 8, "height": 8}  ->  {"id": 3, "puzzle": {...}}
+    {"id": 3}                  ->  the very same response again
+    anything malformed         ->  {"error": "..."}
+Puzzles of the configured sizes are kept in pools, which are refilled
+in a background process pool once they run low. Other sizes are
+generated on demand, so clients can't make the server hoard puzzles of
+arbitrary sizes. Served responses are remembered in an LRU cache, bounded
+by their total size in bytes, so fetching one again by its id is free.
+"""
+import asyncio
+import json
+import logging
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import count
+from typing import Dict, Optional, Tuple
+from slitherlinking.slitherlink_internal_state import Slitherlink
+from slitherlinking.telemetry import TELEMETRY, RunReport, configure_worker
+MAX_GRID_SIZE = 300
+Size = Tuple[int, int]
+LOGGER = logging.getLogger(__name__)
+
+
+class BadPuzzleRequest(Exception):
+    """Raised when a client asks for something the server can't serve."""
+
+
+def generate_puzzle(width: int, height: int
+                    ) -> Tuple[bytes, Optional[RunReport]]:
+    """Makes a puzzle and serializes it. Runs inside a worker process,
+    so the event loop never does the expensive part. The telemetry report
+    (None if disabled) travels back to be merged by the server."""
+    with TELEMETRY.run("generate") as report:
+        with TELEMETRY.timer("clue population"):
+            puzzle = Slitherlink(width, height)
+            puzzle.populate_grid_randomly()
+        with TELEMETRY.timer("serialization"):
+            serialized = json.dumps({"width": width, "height": height,
+                                     "state_of_grid": puzzle.state_of_grid},
+                                    separators=(",", ":")).encode()
+        TELEMETRY.count("puzzles generated")
+    return serialized, report
+
+
+def parse_size(request: Dict[str, object]) -> Size:
+    """Reads the requested (width, height), raises BadPuzzleRequest if bad."""
+    sides = []
+    for key in "width", "height":
+        side = request.get(key)
+        if not isinstance(side, int) or isinstance(side, bool) or\
+                not 1 <= side <= MAX_GRID_SIZE:
+            raise BadPuzzleRequest(
+                f"Width and height must be integers 1-{MAX_GRID_SIZE}."
+            )
+        sides.append(side)
+    return sides[0], sides[1]
+
+
+class ResponseCache:
+    def __init__(self, capacity: int):
+        """
+        Keeps the most recently used responses, as many as fit. Bounded by
+        bytes rather than responses, as a 300x300 puzzle takes ~0.85 MB.
+
+        :param capacity: Maximum total length (B) of the responses held.
+        """
+        self.capacity = capacity
+        self.size = 0  # Total length of the responses held.
+        self.responses: OrderedDict[int, bytes] = OrderedDict()
+
+    def __len__(self):
+        return len(self.responses)
+
+    def get(self, puzzle_id: int) -> Optional[bytes]:
+        response = self.responses.get(puzzle_id)
+        if response is not None:
+            self.responses.move_to_end(puzzle_id)
+        return response
+
+    def put(self, puzzle_id: int, response: bytes):
+        """Remembers the response, one larger than the capacity is not."""
+        older = self.responses.pop(puzzle_id, None)
+        if older is not None:
+            self.size -= len(older)
+        if len(response) > self.capacity:
+            return  # Would evict everything, only to be evicted itself.
+        self.responses[puzzle_id] = response
+        self.size += len(response)
+        while self.size > self.capacity:
+            _, evicted = self.responses.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class PuzzleServer:
+    def __init__(self, pool_size: int = 16, low_water: int = 4,
+                 cache_bytes: int = 64 << 20,
+                 executor: Optional[Executor] = None,
+                 prefilled_sizes: Tuple[Size, ...] = ((8, 8),)):
+        """
+        Sets up the server, nothing is generated until start() is awaited.
+
+        :param pool_size: How many puzzles of each pooled size a refill
+            aims for.
+        :param low_water: A refill starts once a pool holds at most this.
+        :param cache_bytes: Capacity (B) of the LRU cache of served
+            responses, i.e. how much memory they may pin.
+        :param executor: Where the puzzles are generated. A process pool
+            is created (and later shut down) if none is given.
+        :param prefilled_sizes: The only sizes kept in pools, filled on
+            start up. Puzzles of other sizes are generated on demand.
+        """
+        assert 0 <= low_water <= pool_size, "Low water above the pool size."
+        self.pool_size = pool_size
+        self.low_water = low_water
+        self.cache = ResponseCache(cache_bytes)
+        self.owns_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(
+            initializer=configure_worker, initargs=TELEMETRY.settings()
+        )
+        self.prefilled_sizes = prefilled_sizes
+        self.pools: Dict[Size, deque[bytes]] = {
+            size: deque() for size in prefilled_sizes
+        }
+        self.refills: Dict[Size, asyncio.Task[None]] = {}
+        self.puzzle_ids = count(1)
+        self.server: Optional[asyncio.Server] = None
+
+    @property
+    def port(self) -> int:
+        assert self.server is not None, "The server has not started yet."
+        return int(self.server.sockets[0].getsockname()[1])
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        """Opens the socket. Port 0 picks any free one, see self.port."""
+        self.server = await asyncio.start_server(self.handle_client,
+                                                 host, port)
+        for size in self.prefilled_sizes:
+            self.schedule_refill(size)
+
+    async def close(self):
+        """Stops listening, cancels the refills and frees the workers."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for refill in self.refills.values():
+            refill.cancel()
+        await asyncio.gather(*self.refills.values(), return_exceptions=True)
+        if self.owns_executor:
+            self.executor.shutdown()
+
+    async def handle_client(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter):
+        """Answers requests line by line until the client hangs up."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self.respond(line)
+                except BadPuzzleRequest as error:
+                    response = json.dumps({"error": str(error)}).encode()
+                except asyncio.CancelledError:
+                    raise  # Before 3.8 an Exception too, not to be answered.
+                except Exception as error:  # E.g. BrokenProcessPool.
+                    LOGGER.exception("Failed to answer %r.", line)
+                    response = json.dumps({
+                        "error": f"The puzzle could not be made: {error!r}"
+                    }).encode()
+                writer.write(response + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # The client or the whole server is gone, nobody to answer.
+        finally:
+            writer.close()
+
+    async def respond(self, line: bytes) -> bytes:
+        """Turns one request line into one serialized response."""
+        try:
+            request = json.loads(line)
+        except ValueError:
+            raise BadPuzzleRequest("The request is not valid JSON.")
+        if not isinstance(request, dict):
+            raise BadPuzzleRequest("The request must be a JSON object.")
+        if "id" in request:
+            puzzle_id = request["id"]
+            response = None
+            if isinstance(puzzle_id, int):  # Lists etc. aren't hashable.
+                response = self.cache.get(puzzle_id)
+            if response is None:
+                raise BadPuzzleRequest(f"No cached puzzle {request['id']}.")
+            return response
+        puzzle = await self.take_puzzle(parse_size(request))
+        puzzle_id = next(self.puzzle_ids)
+        response = b'{"id":%d,"puzzle":%s}' % (puzzle_id, puzzle)
+        self.cache.put(puzzle_id, response)
+        return response
+
+    async def take_puzzle(self, size: Size) -> bytes:
+        """Pops a pooled puzzle, generating one on the spot if the size
+        isn't pooled or its pool is empty."""
+        pool = self.pools.get(size)
+        if pool is not None:
+            if len(pool) <= self.low_water:
+                self.schedule_refill(size)
+            if pool:
+                return pool.popleft()
+        return await self.generate(size)
+
+    async def generate(self, size: Size) -> bytes:
+        """Makes one puzzle in the executor, merging its telemetry."""
+        loop = asyncio.get_running_loop()
+        puzzle, report = await loop.run_in_executor(self.executor,
+                                                    generate_puzzle, *size)
+        if report is not None:
+            TELEMETRY.merge(report)
+        return puzzle
+
+    def schedule_refill(self, size: Size):
+        """Starts a background refill, unless one is already running."""
+        if size not in self.refills:
+            self.refills[size] = asyncio.create_task(self.refill(size))
+
+    async def refill(self, size: Size):
+        """Tops the pool of the given size back up to self.pool_size.
+        Failures are logged, the next request of the size retries."""
+        pool = self.pools[size]
+        try:
+            missing = self.pool_size - len(pool)
+            puzzles = await asyncio.gather(*(
+                self.generate(size) for _ in range(missing)
+            ), return_exceptions=True)
+            failures = [p for p in puzzles if isinstance(p, BaseException)]
+            pool.extend(p for p in puzzles if isinstance(p, bytes))
+            if failures:
+                LOGGER.error("Refill of %dx%d lost %d of %d puzzles.",
+                             *size, len(failures), missing,
+                             exc_info=failures[0])
+        finally:
+            del self.refills[size]
+
+
+async def serve(host: str, port: int):
+    """Runs a server with the default settings until cancelled."""
+    server = PuzzleServer()
+    await server.start(host, port)
+    print(f"Serving puzzles on {host}:{server.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve("127.0.0.1", 8765))
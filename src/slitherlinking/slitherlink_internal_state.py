@@ -1,4 +1,6 @@
 from random import randint
+from typing import List
+from slitherlinking.topology import GridTopology, topology_for
 
 
 class PathCrossingException(Exception):
@@ -46,6 +48,15 @@ class Slitherlink:
     def __str__(self):
         return "\n".join(str(row) for row in self.state_of_grid)
 
+    @property
+    def topology(self) -> GridTopology:
+        """Adjacency shared by all the grids of this size."""
+        return topology_for(self.width, self.height)
+
+    def flat_state(self) -> List[int]:
+        """A snapshot of self.state_of_grid, for GridTopology's indices."""
+        return [tile for row in self.state_of_grid for tile in row]
+
     def change_line_segment(self, line_x: int, line_y: int, num: int):
         """
         Places or erases an edge. The coordinates must point to
@@ -108,9 +119,16 @@ class Slitherlink:
 
     def check_all_corners(self):
         """Raises a PathCrossingException if the path is crossing itself."""
-        for x_coordinate in range(self.height + 1):
-            for y_coordinate in range(self.width + 1):
-                self.check_a_corner(x_coordinate, y_coordinate)
+        flat, topology = self.flat_state(), self.topology
+        edges = topology.corner_edges
+        for corner in topology.corners:
+            lined = (flat[edges[4 * corner]] == 12) +\
+                (flat[edges[4 * corner + 1]] == 12) +\
+                (flat[edges[4 * corner + 2]] == 12) +\
+                (flat[edges[4 * corner + 3]] == 12)
+            if lined > 2:
+                true_x, true_y = topology.position(corner)
+                self.check_a_corner(true_x // 2, true_y // 2)  # Raises.
 
     def check_a_number(self, cell_x: int, cell_y: int):
         """Returns True iff
@@ -126,10 +144,17 @@ class Slitherlink:
                     )
 
     def check_all_numbers(self):
-        """Raises a CellValueOverload if the path is crossing itself."""
-        for x_coordinate in range(1, self.height + 1):
-            for y_coordinate in range(1, self.width + 1):
-                self.check_a_number(x_coordinate, y_coordinate)
+        """Raises a CellValueOverload if a cell has too many edges."""
+        flat, topology = self.flat_state(), self.topology
+        edges = topology.cell_edges
+        for cell in topology.cells:
+            lined = (flat[edges[4 * cell]] == 12) +\
+                (flat[edges[4 * cell + 1]] == 12) +\
+                (flat[edges[4 * cell + 2]] == 12) +\
+                (flat[edges[4 * cell + 3]] == 12)
+            if lined > flat[cell]:
+                true_x, true_y = topology.position(cell)
+                self.check_a_number(true_x // 2, true_y // 2)  # Raises.
 
     def populate_grid_randomly(self):
         """Fills out the grid cells with random numbers."""
@@ -0,0 +1,277 @@
+"""
+Solving of slitherlink puzzles, also split into regions for big ones.
+
+Solving works directly on Slitherlink.state_of_grid, where 5 is an
+undecided edge, 12 a line and 24 a crossed out edge. First the local
+rules are applied until nothing changes:
+    - a cell with as many lines as its number gets the rest crossed,
+    - a cell with as many lines + undecided edges as its number gets
+      the rest lined,
+    - a corner with 2 lines gets the rest crossed,
+    - a corner with 1 line and 1 undecided edge gets that one lined,
+    - a corner with 0 lines and 1 undecided edge gets that one crossed.
+Whatever the rules can't decide is then found by a backtracking search.
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from slitherlinking.slitherlink_internal_state import Slitherlink
+from slitherlinking.topology import topology_for
+Position = Tuple[int, int]
+# Top, bottom, left and right of a block of state_of_grid. In Python's
+# slicing style, i.e. the bottom row and right column are excluded.
+Block = Tuple[int, int, int, int]
+
+
+class UnsolvablePuzzle(Exception):
+    """Raised when the clues and edges can't be completed into a loop."""
+
+
+def deduce_block(block: List[List[int]], top: int, left: int,
+                 grid_height: int, grid_width: int,
+                 seeds: Optional[Iterable[Position]] = None
+                 ) -> Dict[Position, int]:
+    """
+    Applies the local rules to a rectangular piece of state_of_grid until
+    nothing changes. Only the cells and corners whose four edges all lie
+    in the block are examined, so the outermost rows and columns of the
+    block are there just to be read. The block is changed in place.
+
+    :param block: The rows of state_of_grid in the block, sliced.
+    :param top: Row of state_of_grid where the block starts.
+    :param left: Column of state_of_grid where the block starts.
+    :param grid_height: The puzzle's grid_height, edges beyond are crossed.
+    :param grid_width: The puzzle's grid_width, edges beyond are crossed.
+    :param seeds: Positions (in state_of_grid) to examine first. Every
+        cell and corner of the block is examined if None.
+    :return: The decided edges, keyed by position in state_of_grid.
+    """
+    rows, columns = len(block), len(block[0])
+    first_y, last_y = max(1, 1 - top), min(rows - 2, grid_height - top)
+    first_x, last_x = max(1, 1 - left), min(columns - 2, grid_width - left)
+
+    def value(y: int, x: int) -> int:
+        if 1 <= y + top <= grid_height and 1 <= x + left <= grid_width:
+            return block[y][x]
+        return 24  # Nothing may be drawn outside of the puzzle.
+
+    def is_examined(y: int, x: int) -> bool:
+        """Cells and corners inside the block, i.e. not edges."""
+        return first_y <= y <= last_y and first_x <= x <= last_x and\
+            (y + top) % 2 == (x + left) % 2
+
+    if seeds is None:
+        pending = {(y, x) for y in range(first_y, last_y + 1)
+                   for x in range(first_x, last_x + 1) if is_examined(y, x)}
+    else:
+        pending = {(y - top, x - left) for y, x in seeds
+                   if is_examined(y - top, x - left)}
+    changes: Dict[Position, int] = {}
+    while pending:
+        y, x = pending.pop()
+        edges = ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1))
+        values = [value(*edge) for edge in edges]
+        lines = values.count(12)
+        undecided = [edge for edge, v in zip(edges, values) if v == 5]
+        if (y + top) % 2:  # A corner.
+            if lines > 2 or (lines == 1 and not undecided):
+                raise UnsolvablePuzzle(
+                    f"Dead end or crossing at {y + top}, {x + left}."
+                )
+            if lines == 2 or (lines == 0 and len(undecided) == 1):
+                verdict = 24
+            elif lines == 1 and len(undecided) == 1:
+                verdict = 12
+            else:
+                continue
+        else:  # A cell.
+            number = block[y][x]
+            if number == 4:  # No clue here.
+                continue
+            if not lines <= number <= lines + len(undecided):
+                raise UnsolvablePuzzle(
+                    f"The cell at {y + top}, {x + left} can't be satisfied."
+                )
+            if lines == number:
+                verdict = 24
+            elif lines + len(undecided) == number:
+                verdict = 12
+            else:
+                continue
+        for edge_y, edge_x in undecided:
+            block[edge_y][edge_x] = verdict
+            changes[(edge_y + top, edge_x + left)] = verdict
+            # The edge's neighbours are exactly its two corners and cells.
+            for neighbour in ((edge_y - 1, edge_x), (edge_y + 1, edge_x),
+                              (edge_y, edge_x - 1), (edge_y, edge_x + 1)):
+                if is_examined(*neighbour):
+                    pending.add(neighbour)
+    return changes
+
+
+def is_single_loop(state: List[List[int]]) -> bool:
+    """True iff the lined edges form exactly one closed loop."""
+    topology = topology_for((len(state[0]) - 3) // 2, (len(state) - 3) // 2)
+    flat = [tile for row in state for tile in row]
+    lined = {edge for edge in topology.edges if flat[edge] == 12}
+    if not lined:
+        return False
+    # Walk along the loop from any edge, through its corners.
+    visited = set()
+    to_visit = [next(iter(lined))]
+    corner_edges, edge_corners = topology.corner_edges, topology.edge_corners
+    while to_visit:
+        edge = to_visit.pop()
+        if edge in visited:
+            continue
+        visited.add(edge)
+        for corner in edge_corners[2 * edge:2 * edge + 2]:
+            around = [other for other in corner_edges[4 * corner:4 * corner + 4]
+                      if flat[other] == 12]
+            if len(around) != 2:
+                return False
+            to_visit.extend(around)
+    return visited == lined
+
+
+def search(state: List[List[int]], grid_height: int, grid_width: int,
+           deduced: bool = False) -> Optional[List[List[int]]]:
+    """Depth first search over the undecided edges, applying the rules
+    after every guess. Returns the first solution, or None if none.
+    The first pass of the rules over the whole grid is skipped if they
+    were already applied until nothing changed, i.e. if deduced."""
+    if not deduced:
+        try:
+            deduce_block(state, 0, 0, grid_height, grid_width)
+        except UnsolvablePuzzle:
+            return None
+    stack = [state]
+    while stack:
+        state = stack.pop()
+        guess = next(((y, x) for y in range(1, grid_height + 1)
+                      for x in range(1 + y % 2, grid_width + 1, 2)
+                      if state[y][x] == 5), None)
+        if guess is None:
+            if is_single_loop(state):
+                return state
+            continue
+        y, x = guess
+        for verdict in 24, 12:  # Lines get tried first, they are popped.
+            attempt = [row[:] for row in state]
+            attempt[y][x] = verdict
+            seeds = ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1))
+            try:
+                deduce_block(attempt, 0, 0, grid_height, grid_width, seeds)
+            except UnsolvablePuzzle:
+                continue
+            stack.append(attempt)
+    return None
+
+
+def solved_copy(puzzle: Slitherlink,
+                state: Optional[List[List[int]]]) -> Slitherlink:
+    if state is None:
+        raise UnsolvablePuzzle(f"{puzzle!r} has no solution.")
+    solution = Slitherlink(puzzle.width, puzzle.height)
+    solution.state_of_grid = state
+    return solution
+
+
+def solve(puzzle: Slitherlink) -> Slitherlink:
+    """
+    Solves the puzzle on a single core, the puzzle itself is unchanged.
+
+    :param puzzle: The clues, possibly with some edges already decided.
+    :return: A solved copy, raises UnsolvablePuzzle if there is none.
+    """
+    state = [row[:] for row in puzzle.state_of_grid]
+    return solved_copy(puzzle, search(state, puzzle.grid_height,
+                                      puzzle.grid_width))
+
+
+def spans(count: int, tile_size: int, overlap: int) -> Iterator[Position]:
+    """Ranges of tile_size cells covering count cells, each overlapping
+    the previous one by overlap cells."""
+    start = 0
+    while True:
+        stop = min(start + tile_size, count)
+        yield start, stop
+        if stop == count:
+            return
+        start = stop - overlap
+
+
+def state_spans(count: int, tile_size: int, overlap: int) -> List[Position]:
+    """Rows (or columns) of state_of_grid holding the tiles' cells, all
+    their edges and corners, and one extra row around to read from."""
+    return [(2 * start, 2 * stop + 3)
+            for start, stop in spans(count, tile_size, overlap)]
+
+
+def solve_in_regions(puzzle: Slitherlink, tile_size: int = 32,
+                     overlap: int = 2,
+                     executor: Optional[Executor] = None) -> Slitherlink:
+    """
+    Solves the puzzle by applying the local rules to overlapping square
+    tiles in parallel. Workers return only the edges they decided, which
+    get merged. Tiles with edges decided by somebody else go again, now
+    examining only around those edges. Once that settles, every cell and
+    corner has been examined by some tile, and the global search finishes
+    what is left without another pass over the whole grid.
+
+    :param puzzle: The clues, possibly with some edges already decided.
+    :param tile_size: Side of a tile, in cells.
+    :param overlap: How many rows/columns of cells neighbouring tiles share.
+    :param executor: Where the tiles get worked on. A process pool is
+        created (and shut down) if none is given.
+    :return: A solved copy, raises UnsolvablePuzzle if there is none.
+    """
+    assert 0 <= overlap < tile_size, "Tiles must overlap by less than a tile."
+    state = [row[:] for row in puzzle.state_of_grid]
+    row_spans = state_spans(puzzle.height, tile_size, overlap)
+    column_spans = state_spans(puzzle.width, tile_size, overlap)
+    blocks: List[Block] = [(top, bottom, left, right)
+                           for top, bottom in row_spans
+                           for left, right in column_spans]
+    pool = executor or ProcessPoolExecutor()
+    try:
+        # Which tiles to (re)run, and around which edges. None means all.
+        seeds: Dict[int, Optional[Set[Position]]] =\
+            dict.fromkeys(range(len(blocks)))
+        while seeds:
+            futures = {}
+            for index, tile_seeds in seeds.items():
+                top, bottom, left, right = blocks[index]
+                block = [row[left:right] for row in state[top:bottom]]
+                futures[index] = pool.submit(
+                    deduce_block, block, top, left, puzzle.grid_height,
+                    puzzle.grid_width, tile_seeds
+                )
+            results = {index: future.result()
+                       for index, future in futures.items()}
+            merged: Dict[Position, int] = {}
+            for changes in results.values():
+                for position, verdict in changes.items():
+                    if merged.setdefault(position, verdict) != verdict:
+                        raise UnsolvablePuzzle(
+                            f"Tiles disagree about the edge at {position}."
+                        )
+            # A tile goes again, around every edge another tile decided.
+            foreign_edges: Dict[int, Set[Position]] = {}
+            for (y, x), verdict in merged.items():
+                state[y][x] = verdict
+                for row_index, (top, bottom) in enumerate(row_spans):
+                    if not top <= y < bottom:
+                        continue
+                    for column_index, (left, right) in enumerate(column_spans):
+                        index = row_index * len(column_spans) + column_index
+                        if left <= x < right and\
+                                (y, x) not in results.get(index, {}):
+                            foreign_edges.setdefault(index, set()).update((
+                                (y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)
+                            ))
+            seeds = dict(foreign_edges)
+    finally:
+        if executor is None:
+            pool.shutdown()
+    return solved_copy(puzzle, search(state, puzzle.grid_height,
+                                      puzzle.grid_width, deduced=True))
@@ -0,0 +1,265 @@
+"""
+Named timers and counters for the puzzle making pipeline.
+
+    with TELEMETRY.run("generate"):
+        with TELEMETRY.timer("clue population"):
+            ...
+        TELEMETRY.count("puzzles generated")
+
+Everything is recorded per run, and also summed up across runs. Every
+profile_every-th run is additionally profiled with cProfile, unless
+another run is being profiled at that moment, as only one profiler can
+be active in a process (from Python 3.12 on). Telemetry never raises
+into the measured code, a profile which can't be formatted is noted. A disabled
+Telemetry hands out one shared do-nothing context manager, so leaving
+the hooks in hot code costs about one method call each.
+
+The run being recorded is kept in a context variable, so threads and
+asyncio tasks each record their own runs. Runs recorded in a worker
+process land in that process's copy of the Telemetry, there run() gives
+the report out so that the parent process can merge() it.
+"""
+import cProfile
+import csv
+import io
+import json
+import os
+import pstats
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from time import perf_counter, time
+from typing import ContextManager, Deque, Dict, Iterator, Optional, Tuple
+NO_OP: ContextManager[None] = nullcontext()
+PROFILER_SLOT = threading.Lock()  # Held while a run is being profiled.
+
+
+class RunReport:
+    def __init__(self, label: str, index: int):
+        """
+        Everything measured during one run.
+
+        :param label: What the run was doing, e.g. "generate".
+        :param index: Number of the run, counting from 1 (0 for totals).
+        """
+        self.label = label
+        self.index = index
+        self.pid = os.getpid()  # Where it was recorded, see merge().
+        self.duration = 0.0
+        # Wall clock time (s since the epoch), comparable across processes.
+        self.started, self.finished = 0.0, 0.0
+        self.timings: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.profile: Optional[str] = None  # Text output of pstats.
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"index": self.index, "label": self.label,
+                "duration": self.duration, "timings": self.timings,
+                "counts": self.counts, "profile": self.profile}
+
+
+class Telemetry:
+    def __init__(self, enabled: bool = False, profile_every: int = 0,
+                 profile_lines: int = 20, max_reports: int = 1000):
+        """
+        Collects the measurements, nothing at all while disabled.
+
+        :param enabled: Whether anything gets measured.
+        :param profile_every: Profile every n-th run, 0 never profiles.
+        :param profile_lines: How many pstats lines a profile keeps.
+        :param max_reports: How many of the latest runs keep their own
+            report, the totals include every run.
+        """
+        self.enabled = enabled
+        self.profile_every = profile_every
+        self.profile_lines = profile_lines
+        self.lock = threading.Lock()  # Guards the reports and the totals.
+        self.reports: Deque[RunReport] = deque(maxlen=max_reports)
+        self.totals = RunReport("total", 0)
+        self.runs = 0
+        self.current_run: ContextVar[Optional[RunReport]] =\
+            ContextVar(f"current_run_{id(self)}", default=None)
+
+    @property
+    def current(self) -> Optional[RunReport]:
+        """The run recorded in this thread or task, if any."""
+        return self.current_run.get()
+
+    def reset(self):
+        """Forgets all reports, keeps the settings."""
+        with self.lock:
+            self.reports.clear()
+            self.totals = RunReport("total", 0)
+            self.runs = 0
+
+    def settings(self) -> Tuple[bool, int, int]:
+        """What configure_worker() needs to set up a worker process."""
+        return self.enabled, self.profile_every, self.profile_lines
+
+    def timer(self, name: str) -> ContextManager[None]:
+        """Adds the time spent inside the with block to the named timer."""
+        if not self.enabled:
+            return NO_OP
+        return self.measure(name)
+
+    def count(self, name: str, amount: int = 1):
+        """Increments the named counter."""
+        if not self.enabled:
+            return
+        current = self.current
+        if current is not None:
+            current.counts[name] = current.counts.get(name, 0) + amount
+        with self.lock:
+            self.totals.counts[name] = self.totals.counts.get(name, 0) +\
+                amount
+
+    def run(self, label: str) -> ContextManager[Optional[RunReport]]:
+        """Marks one pass through the pipeline, which gets its own report.
+        The with statement gives the report, or None while disabled."""
+        if not self.enabled:
+            return NO_OP
+        return self.record_run(label)
+
+    def merge(self, report: RunReport):
+        """Adds a run recorded by a worker process. Reports recorded in
+        this very process are already in, so they are skipped."""
+        if report.pid == os.getpid():
+            return
+        with self.lock:
+            self.runs += 1
+            report.index = self.runs
+            self.reports.append(report)
+            self.add_to_totals(report)
+
+    def add_to_totals(self, report: RunReport):
+        """Sums a finished run into the totals, the lock must be held."""
+        self.add_to_span(report)
+        self.totals.duration += report.duration
+        for name, elapsed in report.timings.items():
+            self.totals.timings[name] =\
+                self.totals.timings.get(name, 0.0) + elapsed
+        for name, amount in report.counts.items():
+            self.totals.counts[name] = self.totals.counts.get(name, 0) + amount
+
+    def add_to_span(self, report: RunReport):
+        """Stretches the totals' wall clock span over the finished run,
+        the lock must be held."""
+        if not self.totals.started or report.started < self.totals.started:
+            self.totals.started = report.started
+        self.totals.finished = max(self.totals.finished, report.finished)
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            current = self.current
+            if current is not None:
+                current.timings[name] =\
+                    current.timings.get(name, 0.0) + elapsed
+            with self.lock:
+                self.totals.timings[name] =\
+                    self.totals.timings.get(name, 0.0) + elapsed
+
+    @contextmanager
+    def record_run(self, label: str) -> Iterator[RunReport]:
+        assert self.current is None, "Runs can't be nested."
+        with self.lock:
+            self.runs += 1
+            report = RunReport(label, self.runs)
+        profiler = None
+        if self.profile_every and report.index % self.profile_every == 0 \
+                and PROFILER_SLOT.acquire(blocking=False):
+            profiler = self.start_profiler()
+        token = self.current_run.set(report)
+        report.started = time()
+        start = perf_counter()
+        try:
+            yield report
+        finally:
+            report.duration = perf_counter() - start
+            report.finished = time()
+            self.current_run.reset(token)
+            if profiler is not None:
+                profiler.disable()
+                report.profile = self.profile_text(profiler)
+                PROFILER_SLOT.release()
+            with self.lock:
+                self.totals.duration += report.duration
+                self.add_to_span(report)
+                self.reports.append(report)
+
+    def start_profiler(self) -> Optional[cProfile.Profile]:
+        """Enables a new profiler, the PROFILER_SLOT must be held. Frees
+        the slot and gives None if e.g. some other tool is profiling."""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # Another profiler, not ours, is active.
+            PROFILER_SLOT.release()
+            return None
+        return profiler
+
+    def profile_text(self, profiler: cProfile.Profile) -> str:
+        stream = io.StringIO()
+        try:
+            stats = pstats.Stats(profiler, stream=stream)
+            stats.sort_stats("cumulative").print_stats(self.profile_lines)
+        except Exception as error:  # Never fail the run being measured.
+            return f"The profile could not be formatted: {error!r}"
+        return stream.getvalue()
+
+    def summary(self) -> Dict[str, object]:
+        """
+        Totals over all the runs, including the runs per second.
+
+        seconds is the time spent in the runs, summed up, whereas the
+        runs per second are taken over the wall clock time between the
+        first run's start and the last one's end. So parallel workers
+        add up to a higher throughput.
+        """
+        runs, seconds = self.runs, self.totals.duration
+        wall_seconds = self.totals.finished - self.totals.started
+        return {"runs": runs, "seconds": seconds,
+                "wall_seconds": wall_seconds,
+                "runs_per_second":
+                    runs / wall_seconds if wall_seconds > 0 else 0.0,
+                "timings": self.totals.timings, "counts": self.totals.counts}
+
+    def to_json(self) -> str:
+        """The kept reports and the summary, profiles included."""
+        return json.dumps({"summary": self.summary(),
+                           "runs": [r.as_dict() for r in self.reports]},
+                          indent=2)
+
+    def to_csv(self) -> str:
+        """One row per run, one column per timer and counter.
+        Profiles don't fit into a table, so they are left out."""
+        timer_names = sorted({n for r in self.reports for n in r.timings})
+        counter_names = sorted({n for r in self.reports for n in r.counts})
+        stream = io.StringIO()
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(["index", "label", "duration",
+                         *(f"timer:{name}" for name in timer_names),
+                         *(f"count:{name}" for name in counter_names)])
+        for report in self.reports:
+            writer.writerow([
+                report.index, report.label, report.duration,
+                *(report.timings.get(name, 0.0) for name in timer_names),
+                *(report.counts.get(name, 0) for name in counter_names)
+            ])
+        return stream.getvalue()
+
+
+TELEMETRY = Telemetry()  # Shared by the whole package, off by default.
+
+
+def configure_worker(enabled: bool, profile_every: int, profile_lines: int):
+    """Process pool initializer, gives workers the parent's settings,
+    which spawned (rather than forked) workers wouldn't have."""
+    TELEMETRY.enabled = enabled
+    TELEMETRY.profile_every = profile_every
+    TELEMETRY.profile_lines = profile_lines
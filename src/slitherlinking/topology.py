@@ -0,0 +1,84 @@
+"""
+Adjacency of the tiles of Slitherlink.state_of_grid, shared per size.
+
+Tiles are addressed by a flat index into the padded grid, i.e.
+y * stride + x where stride is the length of a padded row. Every
+adjacency table is a flat array keyed by that index, with a fixed
+number of slots per tile (4 edges around a cell or a corner, 2 corners
+or 2 cells along an edge) and -1 in the slots of other kinds of tiles.
+The order around a tile is always up, down, left, right (or along an
+edge up/left first). Border tiles point into the padding, which never
+holds a line, so no bounds checks are necessary.
+"""
+from array import array
+from functools import lru_cache
+from typing import Tuple
+Position = Tuple[int, int]
+
+
+class GridTopology:
+    def __init__(self, width: int, height: int):
+        """
+        Precomputes the adjacency of a width x height puzzle.
+        Use topology_for() instead, to share the instances.
+
+        :param width: Number of cells in a row of the puzzle.
+        :param height: Number of cells in a column of the puzzle.
+        """
+        self.width = width
+        self.height = height
+        self.grid_width = 2 * width + 1
+        self.grid_height = 2 * height + 1
+        self.stride = self.grid_width + 2  # With the padding included.
+        self.size = self.stride * (self.grid_height + 2)
+        stride = self.stride
+        self.corners = array("i", [
+            self.flat_index(y, x) for y in range(1, self.grid_height + 1, 2)
+            for x in range(1, self.grid_width + 1, 2)
+        ])
+        self.cells = array("i", [
+            self.flat_index(y, x) for y in range(2, self.grid_height, 2)
+            for x in range(2, self.grid_width, 2)
+        ])
+        self.edges = array("i", [
+            self.flat_index(y, x) for y in range(1, self.grid_height + 1)
+            for x in range(1 + y % 2, self.grid_width + 1, 2)
+        ])
+        self.corner_edges = array("i", [-1]) * (4 * self.size)
+        self.cell_edges = array("i", [-1]) * (4 * self.size)
+        self.edge_corners = array("i", [-1]) * (2 * self.size)
+        self.edge_cells = array("i", [-1]) * (2 * self.size)
+        for tiles, around in ((self.corners, self.corner_edges),
+                              (self.cells, self.cell_edges)):
+            for tile in tiles:
+                around[4 * tile:4 * tile + 4] = array("i", (
+                    tile - stride, tile + stride, tile - 1, tile + 1
+                ))
+        for edge in self.edges:
+            vertical = (edge // stride) % 2 == 0  # On a row of cells.
+            before, after = (edge - stride, edge + stride) if vertical else\
+                (edge - 1, edge + 1)
+            across_before, across_after = (edge - 1, edge + 1) if vertical\
+                else (edge - stride, edge + stride)
+            self.edge_corners[2 * edge] = before
+            self.edge_corners[2 * edge + 1] = after
+            self.edge_cells[2 * edge] = across_before
+            self.edge_cells[2 * edge + 1] = across_after
+
+    def __repr__(self):
+        return f"GridTopology(width={self.width}, height={self.height})"
+
+    def flat_index(self, y: int, x: int) -> int:
+        """Flat index of state_of_grid[y][x]."""
+        return y * self.stride + x
+
+    def position(self, flat_index: int) -> Position:
+        """The (y, x) coordinates of a flat index in state_of_grid."""
+        y, x = divmod(flat_index, self.stride)
+        return y, x
+
+
+@lru_cache(maxsize=32)
+def topology_for(width: int, height: int) -> GridTopology:
+    """The one shared GridTopology of the given size."""
+    return GridTopology(width, height)
@@ -0,0 +1,186 @@
+"""A zoomable and pannable window onto a slitherlink grid.
+
+All the geometry is measured in "thin" units: a corner is 1x1 thin,
+an edge is 6x1 thin, a cell is 6x6 thin and the outline leaves 1 thin
+of margin around the whole grid. Hence a grid of width w is 3 + 7*w
+thin units wide. Nothing is stored per tile, every rectangle is
+computed from the camera on demand.
+"""
+from typing import Optional, Tuple
+import pygame
+from visuals.text_button import Position
+MIN_THIN_SIZE = 3
+MAX_THIN_SIZE = 40
+
+
+class Camera:
+    def __init__(self, viewport: pygame.Rect, grid_width: int,
+                 grid_height: int):
+        """
+        Makes a camera looking at the top left corner of the grid.
+
+        :param viewport: The part of the screen the grid is drawn into.
+        :param grid_width: Number of cells in a row of the puzzle.
+        :param grid_height: Number of cells in a column of the puzzle.
+        """
+        self.viewport = viewport
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.thin_size = MIN_THIN_SIZE
+        # Pixel position of the viewport's corner in the (zoomed) grid.
+        self.offset_x, self.offset_y = 0, 0
+        self.fit_to_viewport()
+
+    @classmethod
+    def whole_grid(cls, grid_width: int, grid_height: int,
+                   thin_size: int) -> "Camera":
+        """A camera whose viewport, at (0, 0), shows exactly the whole grid.
+        The thin size is taken as is, the zoom limits are for the screen."""
+        camera = cls(pygame.Rect(0, 0, 0, 0), grid_width, grid_height)
+        camera.thin_size = thin_size
+        camera.viewport.size = camera.total_width, camera.total_height
+        camera.offset_x, camera.offset_y = 0, 0
+        return camera
+
+    @property
+    def cell_size(self) -> int:
+        return 6 * self.thin_size  # This is why the 7* is present.
+
+    @property
+    def size_together(self) -> int:
+        return 7 * self.thin_size
+
+    @property
+    def total_width(self) -> int:
+        return (3 + 7 * self.grid_width) * self.thin_size
+
+    @property
+    def total_height(self) -> int:
+        return (3 + 7 * self.grid_height) * self.thin_size
+
+    def fit_to_viewport(self):
+        """Zooms such that the whole grid fits, if the zoom limits allow."""
+        maximum_column_size = self.viewport.w // (3 + 7 * self.grid_width)
+        maximum_row_size = self.viewport.h // (3 + 7 * self.grid_height)
+        fitting_size = min(10, maximum_row_size, maximum_column_size)
+        self.thin_size = max(MIN_THIN_SIZE, fitting_size)
+        self.offset_x, self.offset_y = 0, 0
+        self.clamp_offsets()
+
+    def clamp_offsets(self):
+        """Keeps a small grid fully visible and a big one covering the view."""
+        spare_x = self.total_width - self.viewport.w
+        spare_y = self.total_height - self.viewport.h
+        self.offset_x = max(min(0, spare_x),
+                            min(self.offset_x, max(0, spare_x)))
+        self.offset_y = max(min(0, spare_y),
+                            min(self.offset_y, max(0, spare_y)))
+
+    def pan(self, delta_x: int, delta_y: int):
+        """Moves the grid by the given number of screen pixels."""
+        self.offset_x -= delta_x
+        self.offset_y -= delta_y
+        self.clamp_offsets()
+
+    def zoom(self, steps: int, anchor: Position):
+        """
+        Changes the thin size by steps pixels, keeping the grid point
+        under the anchor (usually the mouse) in place.
+
+        :param steps: Positive zooms in, negative zooms out.
+        :param anchor: Screen position which should stay put.
+        """
+        new_size = max(MIN_THIN_SIZE,
+                       min(MAX_THIN_SIZE, self.thin_size + steps))
+        if new_size == self.thin_size:
+            return
+        anchor_x = anchor[0] - self.viewport.x
+        anchor_y = anchor[1] - self.viewport.y
+        # The same point expressed in thin units is independent of zoom.
+        thin_x = (anchor_x + self.offset_x) / self.thin_size
+        thin_y = (anchor_y + self.offset_y) / self.thin_size
+        self.thin_size = new_size
+        self.offset_x = round(thin_x * new_size) - anchor_x
+        self.offset_y = round(thin_y * new_size) - anchor_y
+        self.clamp_offsets()
+
+    @property
+    def outline_rect(self) -> pygame.Rect:
+        """The white background of the grid, in screen coordinates."""
+        return pygame.Rect(self.viewport.x - self.offset_x,
+                           self.viewport.y - self.offset_y,
+                           self.total_width, self.total_height)
+
+    def visible_range(self, offset: int, view_length: int,
+                      count: int) -> range:
+        """Indices of the lines (corners, edges across) that may be seen.
+        Cells use the same range with the last index dropped."""
+        first = max(0, (offset - self.thin_size) // self.size_together)
+        last = min(count, (offset + view_length) // self.size_together)
+        return range(first, last + 1)
+
+    def visible_columns(self) -> range:
+        return self.visible_range(self.offset_x, self.viewport.w,
+                                  self.grid_width)
+
+    def visible_rows(self) -> range:
+        return self.visible_range(self.offset_y, self.viewport.h,
+                                  self.grid_height)
+
+    def line_start(self, index: int, horizontal: bool) -> int:
+        """Screen coordinate where the index-th thin line starts."""
+        if horizontal:
+            start = self.viewport.x - self.offset_x
+        else:
+            start = self.viewport.y - self.offset_y
+        return start + self.thin_size + index * self.size_together
+
+    def corner_rect(self, index_x: int, index_y: int) -> pygame.Rect:
+        return pygame.Rect(self.line_start(index_x, True),
+                           self.line_start(index_y, False),
+                           self.thin_size, self.thin_size)
+
+    def horizontal_edge_rect(self, index_x: int, index_y: int) -> pygame.Rect:
+        return pygame.Rect(self.line_start(index_x, True) + self.thin_size,
+                           self.line_start(index_y, False),
+                           self.cell_size, self.thin_size)
+
+    def vertical_edge_rect(self, index_x: int, index_y: int) -> pygame.Rect:
+        return pygame.Rect(self.line_start(index_x, True),
+                           self.line_start(index_y, False) + self.thin_size,
+                           self.thin_size, self.cell_size)
+
+    def cell_rect(self, index_x: int, index_y: int) -> pygame.Rect:
+        return pygame.Rect(self.line_start(index_x, True) + self.thin_size,
+                           self.line_start(index_y, False) + self.thin_size,
+                           self.cell_size, self.cell_size)
+
+    def axis_to_state(self, pixel: int, count: int) -> Optional[int]:
+        """Converts a pixel offset into the grid into a coordinate of
+        Slitherlink.state_of_grid along one axis. Thin lines land on
+        odd coordinates, cells on even ones."""
+        thin_units = pixel // self.thin_size - 1  # Skip the outer margin.
+        if thin_units < 0:
+            return None
+        index, remainder = divmod(thin_units, 7)
+        if remainder == 0:
+            return 2 * index + 1 if index <= count else None
+        return 2 * index + 2 if index < count else None
+
+    def tile_at(self, position: Position) -> Optional[Tuple[int, int]]:
+        """
+        Finds what lies under a screen position, in O(1).
+
+        :param position: An (x,y) screen position, e.g. of a mouse click.
+        :return: A (y, x) coordinate into Slitherlink.state_of_grid,
+            or None if the position misses the grid.
+        """
+        if not self.viewport.collidepoint(position):
+            return None
+        pixel_x = position[0] - self.viewport.x + self.offset_x
+        pixel_y = position[1] - self.viewport.y + self.offset_y
+        state_x = self.axis_to_state(pixel_x, self.grid_width)
+        state_y = self.axis_to_state(pixel_y, self.grid_height)
+        if state_x is None or state_y is None:
+            return None
+        return state_y, state_x
@@ -0,0 +1,225 @@
+"""
+Headless export of puzzles into PNG or SVG images, e.g. for books.
+
+PNGs are drawn by pygame onto an offscreen surface, so no display is
+needed, and SVGs are plain text. Both are laid out by the very same
+Camera as the game screen. Whole archives are exported in a process
+pool. An archive is a JSON lines file with one puzzle per line, either
+bare or wrapped the way slitherlinking.puzzle_server responds, so that
+saved responses can be exported as they are:
+    {"width": 8, "height": 8, "state_of_grid": [[4, 5, 4, ...], ...]}
+    {"id": 3, "puzzle": {"width": 8, "height": 8, "state_of_grid": ...}}
+Puzzles are drawn either with their clues only, or together with the
+lines they contain (i.e. their solution, if they are solved).
+"""
+from argparse import ArgumentParser
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+import json
+import os
+import pygame
+from slitherlinking.slitherlink_internal_state import Slitherlink
+from visuals.camera import Camera
+from visuals.colours import Colour, BLACK, WHITE
+from visuals.grid_drawing import ClueSurfaces, draw_grid,\
+    render_clue_surfaces
+# A puzzle's data, the output path, the image format,
+# whether to draw the solution and the thin size.
+ExportJob = Tuple[Dict[str, object], str, str, bool, int]
+
+
+def puzzle_from_dict(data: Dict[str, object]) -> Slitherlink:
+    """The inverse of the puzzle server's serialization. Takes the
+    puzzle alone, or the whole response with its id. Raises ValueError
+    if the data doesn't describe a grid."""
+    if "puzzle" in data:
+        puzzle_data = data["puzzle"]
+        if not isinstance(puzzle_data, dict):
+            raise ValueError("The puzzle must be an object.")
+        data = puzzle_data
+    width, height = data.get("width"), data.get("height")
+    grid = data.get("state_of_grid")
+    if not isinstance(width, int) or not isinstance(height, int) or\
+            width < 1 or height < 1:
+        raise ValueError("Width and height must be positive integers.")
+    if not isinstance(grid, list) or len(grid) != 2 * height + 3 or\
+            not all(isinstance(row, list) and len(row) == 2 * width + 3
+                    for row in grid):
+        raise ValueError(f"The grid doesn't fit the size {width}x{height}.")
+    puzzle = Slitherlink(width, height)
+    puzzle.state_of_grid = [list(row) for row in grid]
+    return puzzle
+
+
+def load_archive(path: str) -> Iterator[Dict[str, object]]:
+    """Reads the puzzles of a JSON lines archive one by one."""
+    with open(path, encoding="utf-8") as archive:
+        for line in archive:
+            if line.strip():
+                yield json.loads(line)
+
+
+def drawn_grid(puzzle: Slitherlink,
+               with_solution: bool) -> List[List[int]]:
+    """The puzzle's state_of_grid, with the edges undone if clues only."""
+    if with_solution:
+        return puzzle.state_of_grid
+    return [[5 if tile in {12, 24} else tile for tile in row]
+            for row in puzzle.state_of_grid]
+
+
+@lru_cache(maxsize=8)
+def clue_surfaces(cell_size: int) -> ClueSurfaces:
+    """Rendered once per cell size and process."""
+    if not pygame.font.get_init():
+        pygame.font.init()
+    number_surfaces, _ = render_clue_surfaces(cell_size, WHITE)
+    return number_surfaces
+
+
+def render_surface(puzzle: Slitherlink, thin_size: int = 10,
+                   with_solution: bool = False) -> pygame.Surface:
+    """
+    Draws the puzzle onto a new offscreen surface of the exact size.
+
+    :param puzzle: The puzzle to be drawn.
+    :param thin_size: Pixels per thin unit, a cell is 6 of them wide.
+    :param with_solution: Whether the lines get drawn, or only the clues.
+    :return: The surface, the whole grid with its outline.
+    """
+    camera = Camera.whole_grid(puzzle.width, puzzle.height, thin_size)
+    surface = pygame.Surface(camera.viewport.size)
+    draw_grid(surface, camera, drawn_grid(puzzle, with_solution),
+              clue_surfaces(camera.cell_size), None, BLACK)
+    return surface
+
+
+def export_png(puzzle: Slitherlink, path: str, thin_size: int = 10,
+               with_solution: bool = False):
+    pygame.image.save(render_surface(puzzle, thin_size, with_solution), path)
+
+
+def svg_colour(colour: Colour) -> str:
+    red, green, blue, _ = colour
+    return f"rgb({red},{green},{blue})"
+
+
+def svg_text(puzzle: Slitherlink, thin_size: int = 10,
+             with_solution: bool = False) -> str:
+    """
+    Describes the puzzle as an SVG image, laid out like render_surface.
+
+    :param puzzle: The puzzle to be drawn.
+    :param thin_size: User units per thin unit, a cell is 6 of them wide.
+    :param with_solution: Whether the lines get drawn, or only the clues.
+    :return: The SVG document.
+    """
+    camera = Camera.whole_grid(puzzle.width, puzzle.height, thin_size)
+    grid = drawn_grid(puzzle, with_solution)
+    width, height = camera.viewport.size
+    # Corners and lines are many, each kind becomes one compact path.
+    corners, lines, clues = [], [], []
+    for index_y in range(puzzle.height + 1):
+        for index_x in range(puzzle.width + 1):
+            x, y, _, _ = camera.corner_rect(index_x, index_y)
+            corners.append(f"M{x} {y}h{thin_size}v{thin_size}h-{thin_size}z")
+    for y, row in enumerate(grid):
+        for x, tile in enumerate(row):
+            if tile != 12:
+                continue
+            index_x, index_y = (x - 1) // 2, (y - 1) // 2
+            edge = camera.horizontal_edge_rect(index_x, index_y) if y % 2\
+                else camera.vertical_edge_rect(index_x, index_y)
+            lines.append(f"M{edge.x} {edge.y}h{edge.w}v{edge.h}h-{edge.w}z")
+    for index_y in range(puzzle.height):
+        for index_x in range(puzzle.width):
+            number = grid[2 * index_y + 2][2 * index_x + 2]
+            if number in {0, 1, 2, 3}:
+                center_x, center_y = camera.cell_rect(index_x, index_y).center
+                clues.append(f'<text x="{center_x}" y="{center_y}">'
+                             f'{number}</text>')
+    black = svg_colour(BLACK)
+    return "\n".join([
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
+        f'height="{height}" viewBox="0 0 {width} {height}">',
+        f'<rect width="{width}" height="{height}" '
+        f'fill="{svg_colour(WHITE)}"/>',
+        f'<path fill="{black}" d="{"".join(corners)}"/>',
+        f'<path fill="{black}" d="{"".join(lines)}"/>' if lines else "",
+        f'<g fill="{black}" font-family="Palatino Linotype, serif" '
+        f'font-size="{camera.cell_size}" text-anchor="middle" '
+        f'dominant-baseline="central">',
+        *clues,
+        "</g>",
+        "</svg>",
+        ""
+    ])
+
+
+def export_svg(puzzle: Slitherlink, path: str, thin_size: int = 10,
+               with_solution: bool = False):
+    with open(path, "w", encoding="utf-8") as image:
+        image.write(svg_text(puzzle, thin_size, with_solution))
+
+
+def export_one(job: ExportJob) -> str:
+    """Exports one archived puzzle, runs inside a worker process."""
+    data, path, image_format, with_solution, thin_size = job
+    puzzle = puzzle_from_dict(data)
+    if image_format == "png":
+        export_png(puzzle, path, thin_size, with_solution)
+    else:
+        export_svg(puzzle, path, thin_size, with_solution)
+    return path
+
+
+def export_archive(archive: str, output_directory: str,
+                   image_format: str = "png", with_solution: bool = False,
+                   thin_size: int = 10, executor: Optional[Executor] = None,
+                   chunk_size: int = 32) -> List[str]:
+    """
+    Exports every puzzle of an archive, in parallel.
+
+    :param archive: Path to the JSON lines archive.
+    :param output_directory: Where the images go, created if missing.
+        They are named after the puzzle's line, e.g. puzzle_00001.png,
+        or solution_00001.png when drawn with the solution.
+    :param image_format: Either "png" or "svg".
+    :param with_solution: Whether the lines get drawn, or only the clues.
+    :param thin_size: Pixels (or SVG user units) per thin unit.
+    :param executor: Where the images are drawn. A process pool is
+        created (and shut down) if none is given.
+    :param chunk_size: How many puzzles a worker gets at once.
+    :return: The paths of the images, in the archive's order.
+    """
+    assert image_format in {"png", "svg"}, "Only PNG and SVG are supported."
+    os.makedirs(output_directory, exist_ok=True)
+    prefix = "solution" if with_solution else "puzzle"
+    jobs: Iterator[ExportJob] = (
+        (data, os.path.join(output_directory,
+                            f"{prefix}_{index:05d}.{image_format}"),
+         image_format, with_solution, thin_size)
+        for index, data in enumerate(load_archive(archive), 1)
+    )
+    pool = executor or ProcessPoolExecutor()
+    try:
+        return list(pool.map(export_one, jobs, chunksize=chunk_size))
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Exports a puzzle archive.")
+    parser.add_argument("archive", help="JSON lines file, one puzzle each")
+    parser.add_argument("output_directory")
+    parser.add_argument("--svg", action="store_true", help="SVG, not PNG")
+    parser.add_argument("--solution", action="store_true",
+                        help="draw the lines too, not just the clues")
+    parser.add_argument("--thin-size", type=int, default=10)
+    arguments = parser.parse_args()
+    exported = export_archive(arguments.archive, arguments.output_directory,
+                              "svg" if arguments.svg else "png",
+                              arguments.solution, arguments.thin_size)
+    print(f"Exported {len(exported)} images.")
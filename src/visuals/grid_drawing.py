@@ -0,0 +1,78 @@
+"""Drawing of a slitherlink grid as seen through a Camera.
+Shared by the game screen and the headless export."""
+from typing import Dict, List, Optional, Tuple
+from pygame.font import SysFont
+import pygame
+from visuals.camera import Camera
+from visuals.colours import Colour, BLACK, WHITE
+ClueSurfaces = Dict[int, pygame.Surface]
+
+
+def render_clue_surfaces(cell_size: int, number_background: Colour
+                         ) -> Tuple[ClueSurfaces, pygame.Surface]:
+    """Renders the numbers 0-3 and the X of a crossed edge for the given
+    cell size. These are not converted, as there may be no display."""
+    number_font = SysFont("palatinolinotype", cell_size)
+    number_surfaces = {
+        number: number_font.render(str(number), True,
+                                   BLACK, number_background)
+        for number in (0, 1, 2, 3)
+    }
+    x_font = SysFont("palatinolinotype", cell_size // 2)
+    edge_x = x_font.render("x", True, BLACK, WHITE)
+    return number_surfaces, edge_x
+
+
+def draw_grid(screen: pygame.Surface, camera: Camera,
+              grid: List[List[int]], number_surfaces: ClueSurfaces,
+              edge_x: Optional[pygame.Surface], line_colour: Colour):
+    """
+    Draws the part of the grid visible through the camera.
+
+    :param screen: Where to draw, clipped to the camera's viewport.
+    :param camera: Decides the position and size of every tile.
+    :param grid: The Slitherlink.state_of_grid to be drawn.
+    :param number_surfaces: Pre-rendered numbers, for the camera's zoom.
+    :param edge_x: Pre-rendered X for crossed edges, None skips those.
+    :param line_colour: Colour of the lined edges.
+    """
+    columns, rows = camera.visible_columns(), camera.visible_rows()
+    # Cells use the same ranges, without the trailing line index.
+    cell_columns = range(columns.start, min(columns.stop, camera.grid_width))
+    cell_rows = range(rows.start, min(rows.stop, camera.grid_height))
+    screen.set_clip(camera.viewport)
+    pygame.draw.rect(screen, WHITE, camera.outline_rect)
+    for index_y in rows:
+        for index_x in columns:
+            screen.fill(BLACK, camera.corner_rect(index_x, index_y))
+
+    def draw_edge(tile: int, edge_rect: pygame.Rect):
+        """Draws a lined edge, or an X over a marked empty one."""
+        if tile == 12:
+            screen.fill(line_colour, edge_rect)
+        elif tile == 24 and edge_x is not None:
+            screen.blit(edge_x, edge_x.get_rect(center=edge_rect.center))
+
+    # White edges are already drawn by the outline, skip them.
+    for index_y in rows:
+        state_y = 2 * index_y + 1
+        for index_x in cell_columns:
+            tile = grid[state_y][2 * index_x + 2]
+            if tile != 5:
+                draw_edge(tile, camera.horizontal_edge_rect(index_x, index_y))
+    for index_y in cell_rows:
+        state_y = 2 * index_y + 2
+        for index_x in columns:
+            tile = grid[state_y][2 * index_x + 1]
+            if tile != 5:
+                draw_edge(tile, camera.vertical_edge_rect(index_x, index_y))
+    for index_y in cell_rows:
+        state_y = 2 * index_y + 2
+        for index_x in cell_columns:
+            number = grid[state_y][2 * index_x + 2]
+            if number not in number_surfaces:
+                continue
+            surface = number_surfaces[number]
+            grid_cell = camera.cell_rect(index_x, index_y)
+            screen.blit(surface, surface.get_rect(center=grid_cell.center))
+    screen.set_clip(None)
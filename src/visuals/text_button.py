@@ -1,8 +1,9 @@
 from pygame.font import SysFont
 from pygame.sprite import Sprite
+from typing import Tuple
 import pygame
 from visuals.colours import Colour, BLACK
-Position = tuple[int, int]
+Position = Tuple[int, int]
 
 
 def create_surface(text: str, size: int, bg_rgb: Colour, font_rgb: Colour,
@@ -56,14 +57,14 @@ class StateChangerButton(Sprite):
 
 
 class NumberInput:
-    def __init__(self, colours: tuple[Colour, Colour],
+    def __init__(self, colours: Tuple[Colour, Colour],
                  corner_x: int, corner_y: int, label_string: str):
         self.rect = pygame.Rect(corner_x, corner_y, 270, 270)
         assert len(colours) == 2
         self.active_colour, self.inactive_colour = colours
         self.colour = self.inactive_colour
         self.label_size = 20
-        self.input_size = 200
+        self.input_size = 140  # Three digits still fit into the box.
         self.text = "8"
         self.label_list = label_string.split("\n")
         self.input_text, self.label_texts = self.recreate_surfaces()
@@ -96,7 +97,7 @@ class NumberInput:
             elif pygame.K_0 <= pressed_key <= pygame.K_9 or\
                     pygame.K_KP1 <= pressed_key <= pygame.K_KP0:
                 self.text += key_press_event.unicode
-                self.text = self.text[-2:]  # At most 2 characters allowed.
+                self.text = self.text[-3:]  # At most 3 characters allowed.
         # Re-render the text.
         self.input_text, self.label_texts = self.recreate_surfaces()
 
@@ -124,7 +125,7 @@ class NumberInput:
 
 
 class TextTile:
-    def __init__(self, colours: tuple[Colour, Colour],
+    def __init__(self, colours: Tuple[Colour, Colour],
                  corner_x: int, corner_y: int, label_string: str):
         self.rect = pygame.Rect(corner_x, corner_y, 400, 100)
         self.active_colour, self.inactive_colour = colours
@@ -0,0 +1,145 @@
+from visuals.camera import Camera, MIN_THIN_SIZE, MAX_THIN_SIZE
+from typing import Dict, Iterator, Tuple
+import pygame
+import pytest
+
+VIEWPORT = (40, 30, 230, 170)
+Tile = Tuple[int, int]  # Coordinates into Slitherlink.state_of_grid.
+
+
+def drawn_tiles(camera: Camera) -> Iterator[Tuple[Tile, pygame.Rect]]:
+    """Every visible tile with its rectangle, the way draw_grid sees them."""
+    columns, rows = camera.visible_columns(), camera.visible_rows()
+    for index_y in rows:
+        for index_x in columns:
+            line_y, line_x = 2 * index_y + 1, 2 * index_x + 1
+            yield (line_y, line_x), camera.corner_rect(index_x, index_y)
+            if index_x < camera.grid_width:
+                yield ((line_y, line_x + 1),
+                       camera.horizontal_edge_rect(index_x, index_y))
+            if index_y < camera.grid_height:
+                yield ((line_y + 1, line_x),
+                       camera.vertical_edge_rect(index_x, index_y))
+            if index_x < camera.grid_width and index_y < camera.grid_height:
+                yield ((line_y + 1, line_x + 1),
+                       camera.cell_rect(index_x, index_y))
+
+
+def assert_hits_match_drawing(camera: Camera):
+    """Every pixel on screen lands on the tile drawn there, or on none."""
+    drawn: Dict[Tile, Tile] = {}
+    for tile, rect in drawn_tiles(camera):
+        visible = rect.clip(camera.viewport)
+        for y in range(visible.top, visible.bottom):
+            for x in range(visible.left, visible.right):
+                assert (x, y) not in drawn, "Tiles must not overlap."
+                drawn[(x, y)] = tile
+    assert drawn, "Something must be visible."
+    for y in range(camera.viewport.top, camera.viewport.bottom):
+        for x in range(camera.viewport.left, camera.viewport.right):
+            assert camera.tile_at((x, y)) == drawn.get((x, y))
+
+
+@pytest.fixture
+def camera() -> Camera:
+    return Camera(pygame.Rect(VIEWPORT), 12, 9)
+
+
+def test_axis_to_state_follows_the_thin_lines():
+    camera = Camera.whole_grid(2, 1, 1)
+    # Margin, line, 6 thin of a cell, line, 6 thin of a cell, line, margin.
+    expected = [None, 1] + [2] * 6 + [3] + [4] * 6 + [5, None, None]
+    assert [camera.axis_to_state(pixel, 2) for pixel in range(18)] == expected
+
+
+def test_axis_to_state_scales_with_the_thin_size():
+    camera = Camera.whole_grid(2, 1, 4)
+    assert [camera.axis_to_state(pixel, 2) for pixel in (3, 4, 7, 8, 31, 32)]\
+        == [None, 1, 1, 2, 2, 3]
+
+
+def test_tile_at_misses_outside_of_the_viewport(camera: Camera):
+    x, y, width, height = VIEWPORT
+    assert camera.tile_at((x - 1, y + 10)) is None
+    assert camera.tile_at((x + 10, y + height)) is None
+    assert camera.tile_at((x + width, y + 10)) is None
+
+
+def test_tile_at_matches_the_drawing_of_a_fitted_grid(camera: Camera):
+    assert_hits_match_drawing(camera)
+
+
+@pytest.mark.parametrize("steps, pan", [(2, (-25, -40)), (5, (-1000, -1000)),
+                                        (9, (-333, -71)), (-1, (10, 10))])
+def test_tile_at_matches_the_drawing_after_zoom_and_pan(
+        camera: Camera, steps: int, pan: Tuple[int, int]):
+    camera.zoom(steps, camera.viewport.center)
+    camera.pan(*pan)
+    assert_hits_match_drawing(camera)
+
+
+def test_visible_range_covers_exactly_the_seen_lines():
+    camera = Camera.whole_grid(20, 20, 2)  # 14 px per cell and its line.
+    assert camera.visible_range(0, 30, 20) == range(0, 3)
+    # The line 1 ends at 2 + 14 + 2 = 18 px, so it's still seen from 17.
+    assert camera.visible_range(17, 30, 20) == range(1, 4)
+    assert camera.visible_range(18, 30, 20) == range(1, 4)
+    assert camera.visible_range(-20, 30, 20) == range(0, 1)
+    assert not camera.visible_range(-50, 30, 20)
+    assert camera.visible_range(250, 1000, 20) == range(17, 21)
+
+
+def test_visible_ranges_hold_every_tile_on_screen(camera: Camera):
+    camera.zoom(6, camera.viewport.topleft)
+    camera.pan(-123, -45)
+    columns, rows = camera.visible_columns(), camera.visible_rows()
+    for index in range(camera.grid_width + 1):
+        seen = camera.corner_rect(index, rows.start).clip(camera.viewport)\
+            or camera.vertical_edge_rect(index, rows.start).clip(
+                camera.viewport)
+        assert bool(seen) <= (index in columns)
+    for index in range(camera.grid_height + 1):
+        seen = camera.corner_rect(columns.start, index).clip(camera.viewport)\
+            or camera.horizontal_edge_rect(columns.start, index).clip(
+                camera.viewport)
+        assert bool(seen) <= (index in rows)
+
+
+def test_small_grid_stays_fully_visible():
+    camera = Camera(pygame.Rect(VIEWPORT), 3, 2)
+    assert camera.total_width <= camera.viewport.w
+    camera.pan(500, -500)
+    # Negative offsets, the grid moves right, but never past the viewport.
+    assert (camera.offset_x, camera.offset_y) ==\
+        (camera.total_width - camera.viewport.w, 0)
+    assert camera.viewport.contains(camera.outline_rect)
+
+
+def test_big_grid_keeps_covering_the_viewport(camera: Camera):
+    camera.zoom(MAX_THIN_SIZE, camera.viewport.center)
+    camera.pan(10 ** 6, 10 ** 6)
+    assert (camera.offset_x, camera.offset_y) == (0, 0)
+    camera.pan(-10 ** 6, -10 ** 6)
+    outline = camera.outline_rect
+    assert outline.contains(camera.viewport)
+    assert outline.bottomright == camera.viewport.bottomright
+
+
+def test_zoom_is_limited(camera: Camera):
+    camera.zoom(-100, camera.viewport.center)
+    assert camera.thin_size == MIN_THIN_SIZE
+    camera.zoom(100, camera.viewport.center)
+    assert camera.thin_size == MAX_THIN_SIZE
+
+
+@pytest.mark.parametrize("steps", [1, 4, 20, -2])
+def test_zoom_keeps_the_tile_under_the_anchor(camera: Camera, steps: int):
+    camera.zoom(3, camera.viewport.center)
+    camera.pan(-60, -30)
+    # The middle of a cell, as its edges move by rounding at most.
+    anchor = camera.cell_rect(4, 3).center
+    assert camera.tile_at(anchor) == (8, 10)
+    camera.zoom(steps, anchor)
+    assert camera.tile_at(anchor) == (8, 10)
+    assert abs(camera.cell_rect(4, 3).centerx - anchor[0]) <= camera.thin_size
+    assert abs(camera.cell_rect(4, 3).centery - anchor[1]) <= camera.thin_size
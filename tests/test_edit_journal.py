@@ -0,0 +1,163 @@
+from slitherlinking.slitherlink_internal_state import Slitherlink
+from slitherlinking.edit_journal import EditJournal, CorruptJournal,\
+    restore_puzzle, journal_generations, journal_path, snapshot_path,\
+    set_aside_session, EDIT_RECORD, JOURNAL_HEADER, SNAPSHOT_HEADER,\
+    SNAPSHOT_MAGIC
+from random import Random
+import os
+import pytest
+
+
+def random_edits(puzzle: Slitherlink, journal: EditJournal, count: int,
+                 seed: int = 0):
+    """Changes random edges and numbers, the way the editor does."""
+    chooser = Random(seed)
+    for _ in range(count):
+        y = chooser.randint(1, puzzle.grid_height)
+        x = chooser.randrange(1 + y % 2, puzzle.grid_width + 1, 2) if y % 2\
+            else chooser.randint(1, puzzle.grid_width)
+        if (y + x) % 2:
+            new = chooser.choice((5, 12, 24))
+        elif y % 2 == 0:
+            new = chooser.randint(0, 4)
+        else:
+            continue  # A corner, nothing to edit there.
+        old = puzzle.state_of_grid[y][x]
+        puzzle.state_of_grid[y][x] = new
+        journal.record(y, x, old, new)
+
+
+def test_no_session_restores_nothing(tmp_path):
+    assert restore_puzzle(str(tmp_path / "nothing")) is None
+
+
+@pytest.mark.parametrize("width, height", [(1, 1), (8, 8), (30, 20)])
+def test_closed_session_restores_exactly(tmp_path, width: int, height: int):
+    base = str(tmp_path / "session")
+    puzzle = Slitherlink(width, height)
+    journal = EditJournal(base, puzzle)
+    random_edits(puzzle, journal, 1000)
+    journal.close()
+    assert restore_puzzle(base) == puzzle
+
+
+def test_edits_cost_a_few_bytes_each(tmp_path):
+    base = str(tmp_path / "session")
+    puzzle = Slitherlink(20, 20)
+    journal = EditJournal(base, puzzle, batch_size=10)
+    for _ in range(25):
+        puzzle.change_line_segment(1, 2, 12)
+        journal.record(1, 2, 5, 12)
+    journal.close()
+    size = os.path.getsize(journal_path(base, 0))
+    assert size == JOURNAL_HEADER.size + 25 * EDIT_RECORD.size
+
+
+def test_crash_keeps_the_written_batches(tmp_path):
+    base = str(tmp_path / "session")
+    puzzle = Slitherlink(5, 5)
+    journal = EditJournal(base, puzzle, batch_size=4, flush_interval=60)
+    for y, x, new in [(1, 2, 12), (2, 1, 12), (1, 4, 24), (2, 2, 3),
+                      (3, 2, 12)]:
+        old = puzzle.state_of_grid[y][x]
+        puzzle.state_of_grid[y][x] = new
+        journal.record(y, x, old, new)
+    # No close, as if crashed: the fifth edit was still in the buffer.
+    restored = restore_puzzle(base)
+    assert restored is not None
+    assert restored.state_of_grid[2][2] == 3
+    assert restored.state_of_grid[3][2] == 5
+    journal.close()
+
+
+def test_edits_are_written_after_the_interval(tmp_path):
+    base = str(tmp_path / "session")
+    puzzle = Slitherlink(3, 3)
+    journal = EditJournal(base, puzzle, flush_interval=0.01)
+    puzzle.change_number(1, 1, 2)
+    journal.record(2, 2, 4, 2)
+    journal.flush_timer.join()
+    assert restore_puzzle(base) == puzzle
+    journal.close()
+
+
+def test_torn_last_record_is_ignored(tmp_path):
+    base = str(tmp_path / "session")
+    puzzle = Slitherlink(4, 4)
+    journal = EditJournal(base, puzzle)
+    random_edits(puzzle, journal, 50)
+    journal.close()
+    with open(journal_path(base, 0), "ab") as torn:
+        torn.write(EDIT_RECORD.pack(1, 2, 5, 12)[:3])
+    assert restore_puzzle(base) == puzzle
+
+
+def test_compaction_keeps_the_journals_short(tmp_path):
+    base = str(tmp_path / "session")
+    puzzle = Slitherlink(10, 10)
+    journal = EditJournal(base, puzzle, batch_size=16,
+                          compaction_threshold=600)
+    random_edits(puzzle, journal, 5000, seed=7)
+    journal.close()
+    assert len(journal_generations(base)) == 1
+    assert os.path.getsize(journal_path(base, journal.generation)) <= 700
+    assert restore_puzzle(base) == puzzle
+
+
+def test_new_session_replaces_the_old_one(tmp_path):
+    base = str(tmp_path / "session")
+    old_puzzle = Slitherlink(6, 6)
+    old_journal = EditJournal(base, old_puzzle)
+    random_edits(old_puzzle, old_journal, 100)
+    old_journal.close()
+    restored = restore_puzzle(base)
+    assert restored is not None
+    new_journal = EditJournal(base, restored)
+    random_edits(restored, new_journal, 100, seed=1)
+    new_journal.close()
+    assert journal_generations(base) == [1]
+    assert restore_puzzle(base) == restored
+
+
+def test_garbage_snapshot_raises(tmp_path):
+    base = str(tmp_path / "session")
+    EditJournal(base, Slitherlink(2, 2)).close()
+    with open(snapshot_path(base), "r+b") as snapshot:
+        snapshot.write(b"NOPE")
+    with pytest.raises(CorruptJournal):
+        restore_puzzle(base)
+
+
+@pytest.mark.parametrize("width, height", [(65535, 65535), (0, 3), (3, 2)])
+def test_snapshot_with_bogus_size_raises(tmp_path, width: int, height: int):
+    base = str(tmp_path / "session")
+    EditJournal(base, Slitherlink(2, 2)).close()
+    with open(snapshot_path(base), "r+b") as snapshot:
+        snapshot.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, 0, width, height))
+    with pytest.raises(CorruptJournal):
+        restore_puzzle(base)
+
+
+def test_discarded_session_leaves_nothing(tmp_path):
+    base = str(tmp_path / "session")
+    puzzle = Slitherlink(4, 4)
+    journal = EditJournal(base, puzzle, compaction_threshold=64)
+    random_edits(puzzle, journal, 100)
+    journal.discard()
+    journal.discard()  # Nothing left to do.
+    assert restore_puzzle(base) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_corrupt_session_is_set_aside(tmp_path):
+    base = str(tmp_path / "session")
+    EditJournal(base, Slitherlink(2, 2)).close()
+    with open(snapshot_path(base), "r+b") as snapshot:
+        snapshot.write(b"NOPE")
+    moved = set_aside_session(base)
+    assert sorted(moved) == sorted(str(path) for path in tmp_path.iterdir())
+    assert all(path.endswith(".corrupt") for path in moved)
+    assert restore_puzzle(base) is None
+    puzzle = Slitherlink(2, 2)
+    EditJournal(base, puzzle).close()
+    assert restore_puzzle(base) == puzzle
@@ -0,0 +1,137 @@
+from slitherlinking.slitherlink_internal_state import Slitherlink
+from visuals.camera import Camera
+from visuals.colours import BLACK, WHITE
+from visuals.export import export_archive, load_archive, puzzle_from_dict,\
+    render_surface, svg_text
+from concurrent.futures import ThreadPoolExecutor
+import json
+import pygame
+import pytest
+
+# Lined edges (x, y in change_line_segment's order) and clues (row, column).
+LINES = [(1, 2), (2, 1), (2, 3), (3, 2)]
+CLUES = [(1, 1, 3), (2, 3, 0)]
+
+
+@pytest.fixture
+def puzzle() -> Slitherlink:
+    puzzle = Slitherlink(4, 3)
+    for x_coordinate, y_coordinate in LINES:
+        puzzle.change_line_segment(x_coordinate, y_coordinate, 12)
+    puzzle.change_line_segment(5, 4, 24)
+    for row, column, number in CLUES:
+        puzzle.change_number(row, column, number)
+    return puzzle
+
+
+def as_dict(puzzle: Slitherlink) -> dict:
+    return {"width": puzzle.width, "height": puzzle.height,
+            "state_of_grid": puzzle.state_of_grid}
+
+
+def colours_in(surface: pygame.Surface, rect: pygame.Rect) -> set:
+    return {tuple(surface.get_at((x, y)))
+            for y in range(rect.top, rect.bottom)
+            for x in range(rect.left, rect.right)}
+
+
+@pytest.mark.parametrize("thin_size", [1, 4, 10])
+def test_image_has_the_grid_size(puzzle: Slitherlink, thin_size: int):
+    width, height = (3 + 7 * 4) * thin_size, (3 + 7 * 3) * thin_size
+    assert render_surface(puzzle, thin_size).get_size() == (width, height)
+    assert f'width="{width}" height="{height}"' in svg_text(puzzle, thin_size)
+
+
+@pytest.mark.parametrize("with_solution", [False, True])
+def test_tiles_are_drawn_where_the_camera_puts_them(puzzle: Slitherlink,
+                                                    with_solution: bool):
+    surface = render_surface(puzzle, 5, with_solution)
+    camera = Camera.whole_grid(puzzle.width, puzzle.height, 5)
+    for index_y in range(puzzle.height + 1):
+        for index_x in range(puzzle.width + 1):
+            corner = camera.corner_rect(index_x, index_y)
+            assert colours_in(surface, corner) == {BLACK}
+    lined = camera.horizontal_edge_rect(0, 0)  # Line segment (1, 2).
+    empty = camera.horizontal_edge_rect(1, 0)
+    crossed = camera.horizontal_edge_rect(1, 2)  # Line segment (5, 4).
+    assert colours_in(surface, lined) == {BLACK if with_solution else WHITE}
+    assert colours_in(surface, empty) == colours_in(surface, crossed) ==\
+        {WHITE}
+    for index_y in range(puzzle.height):
+        for index_x in range(puzzle.width):
+            clued = any((row, column) == (index_y + 1, index_x + 1)
+                        for row, column, _ in CLUES)
+            cell = colours_in(surface, camera.cell_rect(index_x, index_y))
+            assert (cell != {WHITE}) == clued
+
+
+def test_svg_holds_clues_and_lines_only_with_the_solution(
+        puzzle: Slitherlink):
+    camera = Camera.whole_grid(puzzle.width, puzzle.height, 10)
+    clues_only = svg_text(puzzle, 10)
+    solution = svg_text(puzzle, 10, with_solution=True)
+    for image in clues_only, solution:
+        for row, column, number in CLUES:
+            center_x, center_y = camera.cell_rect(column - 1, row - 1).center
+            assert f'<text x="{center_x}" y="{center_y}">{number}</text>'\
+                in image
+        assert image.count("<text ") == len(CLUES)
+        assert image.count("h10v10h-10z") == 5 * 4  # All the corners.
+    edge = camera.horizontal_edge_rect(0, 0)
+    lined = f"M{edge.x} {edge.y}h{edge.w}v{edge.h}h-{edge.w}z"
+    assert lined in solution and lined not in clues_only
+    assert solution.count(f"h{edge.w}v{edge.h}") +\
+        solution.count(f"h{edge.h}v{edge.w}") == len(LINES)
+
+
+@pytest.mark.parametrize("change", [
+    lambda data: data.update(width="4"),
+    lambda data: data.update(height=0),
+    lambda data: data.pop("state_of_grid"),
+    lambda data: data["state_of_grid"].pop(),
+    lambda data: data["state_of_grid"][3].pop(),
+    lambda data: data["state_of_grid"].__setitem__(2, "not a row")
+])
+def test_malformed_puzzles_raise(puzzle: Slitherlink, change):
+    data = as_dict(puzzle)
+    data["state_of_grid"] = [row[:] for row in puzzle.state_of_grid]
+    change(data)
+    with pytest.raises(ValueError):
+        puzzle_from_dict(data)
+    with pytest.raises(ValueError):
+        puzzle_from_dict({"id": 1, "puzzle": data})
+
+
+def test_response_without_a_puzzle_object_raises():
+    with pytest.raises(ValueError):
+        puzzle_from_dict({"id": 1, "puzzle": [1, 2]})
+
+
+def test_server_responses_are_unwrapped(puzzle: Slitherlink):
+    response = {"id": 7, "puzzle": as_dict(puzzle)}
+    assert str(puzzle_from_dict(response)) == str(puzzle)
+    assert str(puzzle_from_dict(as_dict(puzzle))) == str(puzzle)
+
+
+@pytest.mark.parametrize("image_format", ["png", "svg"])
+@pytest.mark.parametrize("with_solution, prefix", [(False, "puzzle"),
+                                                   (True, "solution")])
+def test_archive_export_names_images_by_line(tmp_path, puzzle: Slitherlink,
+                                             image_format: str,
+                                             with_solution: bool, prefix: str):
+    archive = tmp_path / "archive.jsonl"
+    small = Slitherlink(2, 1)
+    lines = [as_dict(puzzle), {"id": 1, "puzzle": as_dict(small)},
+             as_dict(small)]
+    archive.write_text("\n".join(map(json.dumps, lines)) + "\n\n")
+    assert len(list(load_archive(str(archive)))) == 3
+    output = tmp_path / "images"
+    with ThreadPoolExecutor(2) as executor:
+        paths = export_archive(str(archive), str(output), image_format,
+                               with_solution, 2, executor, chunk_size=2)
+    names = [f"{prefix}_{index:05d}.{image_format}" for index in (1, 2, 3)]
+    assert paths == [str(output / name) for name in names]
+    assert sorted(path.name for path in output.iterdir()) == names
+    if image_format == "png":
+        sizes = [pygame.image.load(path).get_size() for path in paths]
+        assert sizes == [(62, 48), (34, 20), (34, 20)]
@@ -0,0 +1,168 @@
+from slitherlinking.puzzle_server import PuzzleServer, ResponseCache
+from slitherlinking.slitherlink_internal_state import Slitherlink
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Tuple
+import asyncio
+import json
+import logging
+import pytest
+
+
+async def ask(port: int, *requests: dict) -> list:
+    """A tiny local client, sends the requests over one connection."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    answers = []
+    for request in requests:
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        answers.append(json.loads(await reader.readline()))
+    writer.close()
+    await writer.wait_closed()
+    return answers
+
+
+def run_with_server(scenario, **settings):
+    """Starts a server on a free port, runs the scenario against it."""
+    async def wrapper():
+        server = PuzzleServer(executor=ThreadPoolExecutor(2), **settings)
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.close()
+    return asyncio.run(wrapper())
+
+
+@pytest.mark.parametrize("width, height", [(1, 1), (8, 8), (5, 12)])
+def test_served_puzzle_has_the_asked_size(width: int, height: int):
+    async def scenario(server):
+        return await ask(server.port, {"width": width, "height": height})
+    answer, = run_with_server(scenario)
+    puzzle = answer["puzzle"]
+    assert (puzzle["width"], puzzle["height"]) == (width, height)
+    grid = puzzle["state_of_grid"]
+    assert len(grid) == len(Slitherlink(width, height).state_of_grid)
+    assert all(len(row) == 2 * width + 3 for row in grid)
+
+
+def test_fetching_again_by_id_gives_the_same_puzzle():
+    async def scenario(server):
+        fresh, = await ask(server.port, {"width": 4, "height": 3})
+        again, = await ask(server.port, {"id": fresh["id"]})
+        return fresh, again
+    fresh, again = run_with_server(scenario)
+    assert fresh == again
+
+
+@pytest.mark.parametrize("request_line", [
+    b"not json",
+    b"[1, 2]",
+    b'{"width": 0, "height": 5}',
+    b'{"width": 5, "height": 301}',
+    b'{"width": "5", "height": 5}',
+    b'{"width": true, "height": 5}',
+    b'{"id": 12345}',
+    b'{"id": [1]}'
+])
+def test_bad_requests_get_an_error(request_line: bytes):
+    async def scenario(server):
+        reader, writer = await asyncio.open_connection("127.0.0.1",
+                                                       server.port)
+        writer.write(request_line + b"\n")
+        answer = json.loads(await reader.readline())
+        writer.close()
+        return answer
+    assert "error" in run_with_server(scenario)
+
+
+def test_hundreds_of_concurrent_clients():
+    async def scenario(server):
+        clients = [ask(server.port, {"width": 6, "height": 6})
+                   for _ in range(300)]
+        return await asyncio.gather(*clients)
+    answers = run_with_server(scenario, pool_size=32, low_water=8)
+    ids = {answer["id"] for answer, in answers}
+    assert len(ids) == 300
+
+
+def test_pool_is_refilled_in_the_background():
+    async def wait_for_refills(server):
+        while server.refills:
+            await asyncio.sleep(0.01)
+        return len(server.pools[(3, 3)])
+
+    async def scenario(server):
+        prefilled = await wait_for_refills(server)
+        await ask(server.port, *[{"width": 3, "height": 3}] * 6)
+        above_low_water = await wait_for_refills(server)
+        await ask(server.port, {"width": 3, "height": 3})
+        return prefilled, above_low_water, await wait_for_refills(server)
+    pool_lengths = run_with_server(scenario, pool_size=10, low_water=4,
+                                   prefilled_sizes=((3, 3),))
+    assert pool_lengths == (10, 4, 10)
+
+
+def test_only_the_configured_sizes_are_pooled():
+    async def scenario(server):
+        await ask(server.port, *({"width": side, "height": side}
+                                 for side in range(1, 6)))
+        while server.refills:
+            await asyncio.sleep(0.01)
+        return server.pools
+    pools = run_with_server(scenario, pool_size=5, low_water=2,
+                            prefilled_sizes=((3, 3),))
+    assert set(pools) == {(3, 3)}
+    assert len(pools[(3, 3)]) == 4
+
+
+def broken_worker(width: int, height: int) -> Tuple[bytes, None]:
+    raise BrokenProcessPool("A worker died.")
+
+
+def test_worker_failures_get_an_error(monkeypatch, caplog):
+    monkeypatch.setattr("slitherlinking.puzzle_server.generate_puzzle",
+                        broken_worker)
+
+    async def scenario(server):
+        answers = await ask(server.port, {"width": 3, "height": 3},
+                            {"width": 4, "height": 4})
+        while server.refills:
+            await asyncio.sleep(0.01)
+        return answers, server.pools[(3, 3)]
+    with caplog.at_level(logging.ERROR):
+        answers, pool = run_with_server(scenario, prefilled_sizes=((3, 3),))
+    assert all("BrokenProcessPool" in answer["error"] for answer in answers)
+    assert not pool
+    assert any("Refill of 3x3 lost 16 of 16 puzzles." in record.message
+               for record in caplog.records)
+
+
+def test_cache_forgets_the_least_recently_used():
+    cache = ResponseCache(8)
+    cache.put(1, b"one")
+    cache.put(2, b"two")
+    assert cache.get(1) == b"one"  # Now 2 is the least recently used.
+    cache.put(3, b"three")
+    assert cache.get(2) is None
+    assert (cache.get(1), cache.get(3), len(cache)) == (b"one", b"three", 2)
+
+
+def test_cache_is_bounded_by_bytes():
+    cache = ResponseCache(10)
+    for puzzle_id in range(1, 6):
+        cache.put(puzzle_id, b"four")
+    assert (len(cache), cache.size) == (2, 8)
+    cache.put(5, b"a bit longer")  # Too big to be kept at all.
+    assert cache.get(5) is None
+    assert (len(cache), cache.size) == (1, 4)
+    assert cache.get(4) == b"four"
+
+
+def test_cache_pins_only_so_many_bytes_of_big_puzzles():
+    async def scenario(server):
+        await ask(server.port, *[{"width": 40, "height": 40}] * 10)
+        return server.cache
+    cache = run_with_server(scenario, cache_bytes=30_000)
+    assert cache.size <= 30_000
+    assert 0 < len(cache) < 10
@@ -0,0 +1,110 @@
+from slitherlinking.slitherlink_internal_state import Slitherlink
+from slitherlinking.solver import UnsolvablePuzzle, solve, solve_in_regions,\
+    spans, is_single_loop
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+import pytest
+Position = Tuple[int, int]
+Rectangle = Tuple[int, int, int, int]
+
+
+def puzzle_from_shape(width: int, height: int,
+                      rectangles: List[Rectangle]) -> Slitherlink:
+    """Clues every cell of a puzzle, whose loop runs around the union of
+    the rectangles (first row, first column, last row, last column)."""
+    inside = {(row, column) for top, left, bottom, right in rectangles
+              for row in range(top, bottom + 1)
+              for column in range(left, right + 1)}
+    puzzle = Slitherlink(width, height)
+    for row in range(1, height + 1):
+        for column in range(1, width + 1):
+            neighbours = ((row - 1, column), (row + 1, column),
+                          (row, column - 1), (row, column + 1))
+            borders = sum(((row, column) in inside) != (n in inside)
+                          for n in neighbours)
+            puzzle.change_number(row, column, borders)
+    return puzzle
+
+
+def assert_is_solution(puzzle: Slitherlink, solution: Slitherlink):
+    assert is_single_loop(solution.state_of_grid)
+    for row in range(1, puzzle.height + 1):
+        for column in range(1, puzzle.width + 1):
+            number = puzzle.state_of_grid[2 * row][2 * column]
+            lines = solution.number_of_lined_edges_around(2 * row, 2 * column)
+            assert number == 4 or lines == number
+
+
+SHAPES = [
+    (1, 1, [(1, 1, 1, 1)]),
+    (4, 3, [(1, 1, 2, 3), (2, 2, 3, 4)]),
+    (9, 7, [(2, 2, 6, 3), (3, 2, 4, 8), (1, 7, 5, 8)]),
+    (20, 15, [(3, 3, 12, 6), (6, 1, 8, 19), (1, 15, 15, 17)])
+]
+
+
+@pytest.mark.parametrize("width, height, rectangles", SHAPES)
+def test_solve_finds_a_loop(width: int, height: int,
+                            rectangles: List[Rectangle]):
+    puzzle = puzzle_from_shape(width, height, rectangles)
+    assert_is_solution(puzzle, solve(puzzle))
+
+
+@pytest.mark.parametrize("width, height, rectangles", SHAPES)
+@pytest.mark.parametrize("tile_size, overlap", [(1, 0), (3, 1), (5, 2)])
+def test_regions_solve_the_same_puzzles(width: int, height: int,
+                                        rectangles: List[Rectangle],
+                                        tile_size: int, overlap: int):
+    puzzle = puzzle_from_shape(width, height, rectangles)
+    with ThreadPoolExecutor(4) as executor:
+        solution = solve_in_regions(puzzle, tile_size, overlap, executor)
+    assert_is_solution(puzzle, solution)
+
+
+def test_regions_solve_in_the_default_process_pool():
+    width, height, rectangles = SHAPES[-1]
+    puzzle = puzzle_from_shape(width, height, rectangles)
+    assert_is_solution(puzzle, solve_in_regions(puzzle, 6, 1))
+
+
+def test_solving_leaves_the_puzzle_alone():
+    puzzle = puzzle_from_shape(4, 3, [(1, 1, 2, 3)])
+    untouched = str(puzzle)
+    solve(puzzle)
+    assert str(puzzle) == untouched
+
+
+def test_clueless_puzzle_still_gets_a_loop():
+    assert_is_solution(Slitherlink(3, 3), solve(Slitherlink(3, 3)))
+
+
+@pytest.mark.parametrize("size, numbers, lines", [
+    (1, [(1, 1, 3)], []),
+    (2, [(1, 1, 0), (1, 2, 0), (2, 1, 0), (2, 2, 0)], []),
+    (3, [], [(1, 2), (1, 4), (2, 3)]),
+    (1, [(1, 1, 1)], [(1, 2), (3, 2)])
+])
+def test_unsolvable_puzzles_raise(size: int,
+                                  numbers: List[Tuple[int, int, int]],
+                                  lines: List[Position]):
+    puzzle = Slitherlink(size, size)
+    for row, column, number in numbers:
+        puzzle.change_number(row, column, number)
+    for x_coordinate, y_coordinate in lines:
+        puzzle.change_line_segment(x_coordinate, y_coordinate, 12)
+    with pytest.raises(UnsolvablePuzzle):
+        solve(puzzle)
+    with ThreadPoolExecutor(2) as executor, pytest.raises(UnsolvablePuzzle):
+        solve_in_regions(puzzle, 1, 0, executor)
+
+
+@pytest.mark.parametrize("count, tile_size, overlap", [
+    (1, 32, 2), (10, 3, 1), (10, 4, 0), (100, 32, 2), (7, 7, 3)
+])
+def test_spans_cover_everything_with_overlap(count: int, tile_size: int,
+                                             overlap: int):
+    covered = list(spans(count, tile_size, overlap))
+    assert covered[0][0] == 0 and covered[-1][1] == count
+    assert all(stop - start <= tile_size for start, stop in covered)
+    for (_, previous_stop), (start, _) in zip(covered, covered[1:]):
+        assert previous_stop - start == overlap
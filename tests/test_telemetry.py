@@ -0,0 +1,167 @@
+from slitherlinking.telemetry import Telemetry, NO_OP, TELEMETRY,\
+    configure_worker
+from slitherlinking.puzzle_server import generate_puzzle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Barrier
+from time import sleep
+import csv
+import io
+import json
+import pytest
+
+
+def test_disabled_telemetry_records_nothing():
+    disabled = Telemetry()
+    assert disabled.timer("anything") is NO_OP
+    assert disabled.run("anything") is NO_OP
+    with disabled.run("generate"), disabled.timer("stage"):
+        disabled.count("puzzles")
+    assert not disabled.reports
+    assert disabled.summary()["runs"] == 0
+
+
+def test_timers_and_counters_are_kept_per_run_and_in_total():
+    enabled = Telemetry(enabled=True)
+    for run in range(3):
+        with enabled.run("generate"):
+            with enabled.timer("stage"):
+                pass
+            enabled.count("puzzles", run)
+    assert [r.index for r in enabled.reports] == [1, 2, 3]
+    assert [r.counts["puzzles"] for r in enabled.reports] == [0, 1, 2]
+    assert all(r.timings["stage"] <= r.duration for r in enabled.reports)
+    summary = enabled.summary()
+    assert summary["runs"] == 3
+    assert summary["counts"] == {"puzzles": 3}
+    assert summary["timings"]["stage"] == pytest.approx(
+        sum(r.timings["stage"] for r in enabled.reports))
+
+
+def test_report_survives_an_exception_in_the_run():
+    enabled = Telemetry(enabled=True)
+    with pytest.raises(ZeroDivisionError):
+        with enabled.run("generate"), enabled.timer("stage"):
+            1 / 0
+    assert "stage" in enabled.reports[0].timings
+    assert enabled.current is None
+
+
+@pytest.mark.parametrize("profile_every, profiled_runs", [
+    (0, []), (1, [1, 2, 3, 4]), (2, [2, 4]), (3, [3])
+])
+def test_only_sampled_runs_get_profiled(profile_every: int,
+                                        profiled_runs: list):
+    sampled = Telemetry(enabled=True, profile_every=profile_every)
+    for _ in range(4):
+        with sampled.run("generate"):
+            sum(range(1000))
+    assert [r.index for r in sampled.reports if r.profile] == profiled_runs
+
+
+def test_json_and_csv_exports(monkeypatch):
+    enabled = Telemetry(enabled=True, profile_every=2)
+    monkeypatch.setattr("slitherlinking.puzzle_server.TELEMETRY", enabled)
+    for _ in range(2):
+        generate_puzzle(5, 5)
+    exported = json.loads(enabled.to_json())
+    assert exported["summary"]["counts"] == {"puzzles generated": 2}
+    assert exported["runs"][1]["profile"]
+    rows = list(csv.DictReader(io.StringIO(enabled.to_csv())))
+    assert len(rows) == 2
+    assert set(rows[0]) == {"index", "label", "duration",
+                            "timer:clue population", "timer:serialization",
+                            "count:puzzles generated"}
+
+
+def test_only_the_latest_reports_are_kept():
+    capped = Telemetry(enabled=True, max_reports=3)
+    for _ in range(5):
+        with capped.run("generate"):
+            capped.count("puzzles")
+    assert [r.index for r in capped.reports] == [3, 4, 5]
+    assert capped.summary()["runs"] == 5
+    assert capped.summary()["counts"] == {"puzzles": 5}
+
+
+@pytest.fixture
+def enabled_telemetry():
+    """Turns the shared TELEMETRY on for the test, and off after it."""
+    configure_worker(True, 0, 20)
+    yield TELEMETRY
+    configure_worker(False, 0, 20)
+    TELEMETRY.reset()
+
+
+def test_runs_in_threads_are_recorded_apart(enabled_telemetry):
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(generate_puzzle, [4] * 40, [4] * 40))
+    assert all(report is not None for _, report in results)
+    for _, report in results:
+        enabled_telemetry.merge(report)  # Skipped, this process has them.
+    summary = enabled_telemetry.summary()
+    assert summary["runs"] == 40
+    assert summary["counts"] == {"puzzles generated": 40}
+    assert sorted(r.index for r in enabled_telemetry.reports) ==\
+        list(range(1, 41))
+    assert all(r.counts == {"puzzles generated": 1}
+               for r in enabled_telemetry.reports)
+
+
+def test_runs_in_worker_processes_are_merged(enabled_telemetry):
+    with ProcessPoolExecutor(2, initializer=configure_worker,
+                             initargs=enabled_telemetry.settings()) as pool:
+        results = list(pool.map(generate_puzzle, [4] * 6, [4] * 6))
+    assert enabled_telemetry.summary()["runs"] == 0
+    for _, report in results:
+        enabled_telemetry.merge(report)
+    summary = enabled_telemetry.summary()
+    assert summary["runs"] == 6
+    assert summary["counts"] == {"puzzles generated": 6}
+    assert set(summary["timings"]) == {"clue population", "serialization"}
+    assert [r.index for r in enabled_telemetry.reports] == list(range(1, 7))
+
+
+def test_runs_profiled_at_once_are_all_kept():
+    sampled = Telemetry(enabled=True, profile_every=1)
+    together = Barrier(4)
+
+    def profiled_run(_):
+        with sampled.run("generate"):
+            together.wait()  # All four runs are active now.
+            sum(range(1000))
+            together.wait()
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(profiled_run, range(4)))
+    assert sampled.summary()["runs"] == len(sampled.reports) == 4
+    assert sum(r.profile is not None for r in sampled.reports) == 1
+    with sampled.run("generate"):
+        pass  # The profiler is free again.
+    assert sampled.reports[-1].profile
+
+
+def test_failing_profile_doesnt_fail_the_run(monkeypatch):
+    sampled = Telemetry(enabled=True, profile_every=1)
+
+    def broken_stats(*arguments, **keywords):
+        raise TypeError("Cannot create or construct a pstats.Stats object")
+    monkeypatch.setattr("pstats.Stats", broken_stats)
+    with sampled.run("generate"):
+        sampled.count("puzzles")
+    report, = sampled.reports
+    assert report.counts == {"puzzles": 1}
+    assert "could not be formatted" in str(report.profile)
+
+
+def test_throughput_is_taken_over_the_wall_clock():
+    enabled = Telemetry(enabled=True)
+
+    def slow_run(_):
+        with enabled.run("generate"):
+            sleep(0.05)
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(slow_run, range(8)))
+    summary = enabled.summary()
+    assert summary["seconds"] >= 8 * 0.05
+    assert summary["wall_seconds"] < summary["seconds"] / 2
+    assert summary["runs_per_second"] == pytest.approx(
+        8 / summary["wall_seconds"])
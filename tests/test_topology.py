@@ -0,0 +1,69 @@
+from slitherlinking.slitherlink_internal_state import Slitherlink,\
+    PathCrossingException, CellValueOverload
+from slitherlinking.topology import topology_for
+import pytest
+
+SIZES = [(1, 1), (3, 4), (6, 2), (10, 10)]
+
+
+@pytest.mark.parametrize("width, height", SIZES)
+def test_same_sized_grids_share_one_topology(width: int, height: int):
+    first, second = Slitherlink(width, height), Slitherlink(width, height)
+    assert first.topology is second.topology
+    assert first.topology is not Slitherlink(width + 1, height).topology
+
+
+@pytest.mark.parametrize("width, height", SIZES)
+def test_tiles_are_sorted_into_the_right_kinds(width: int, height: int):
+    topology = topology_for(width, height)
+    flat = Slitherlink(width, height).flat_state()
+    assert len(flat) == topology.size
+    assert len(topology.corners) == (width + 1) * (height + 1)
+    assert len(topology.cells) == width * height
+    assert len(topology.edges) == width * (height + 1) + height * (width + 1)
+    assert {flat[corner] for corner in topology.corners} == {-1}
+    assert {flat[cell] for cell in topology.cells} == {4}
+    assert {flat[edge] for edge in topology.edges} == {5}
+
+
+@pytest.mark.parametrize("width, height", SIZES)
+def test_adjacency_matches_the_coordinate_arithmetic(width: int, height: int):
+    topology = topology_for(width, height)
+    for tiles, around in ((topology.corners, topology.corner_edges),
+                          (topology.cells, topology.cell_edges)):
+        for tile in tiles:
+            y, x = topology.position(tile)
+            assert [topology.position(i) for i in around[4 * tile:][:4]] ==\
+                [(y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)]
+    corners = set(topology.corners)
+    flat = Slitherlink(width, height).flat_state()
+    for edge in topology.edges:
+        ends = topology.edge_corners[2 * edge:2 * edge + 2]
+        sides = topology.edge_cells[2 * edge:2 * edge + 2]
+        assert all(corner in corners for corner in ends)
+        assert {flat[cell] for cell in sides} == {4}  # Padding included.
+        assert sorted(abs(edge - other) for other in (*ends, *sides)) ==\
+            sorted([1, 1, topology.stride, topology.stride])
+    assert set(topology.cell_edges[4 * topology.edges[0]:][:4]) == {-1}
+
+
+@pytest.mark.parametrize("lines, bad_corner", [
+    ([(1, 2), (1, 4), (2, 3)], "0, 1"),
+    ([(9, 10), (8, 11), (10, 11)], "4, 5"),
+    ([(6, 9), (7, 8), (7, 10), (8, 9)], "3, 4")
+])
+def test_all_corners_check_reports_the_crossing(lines, bad_corner: str):
+    grid = Slitherlink(5, 6)
+    for x_coordinate, y_coordinate in lines:
+        grid.change_line_segment(x_coordinate, y_coordinate, 12)
+    with pytest.raises(PathCrossingException, match=bad_corner):
+        grid.check_all_corners()
+
+
+def test_all_numbers_check_reports_the_overload(number_test_grid: Slitherlink):
+    overloaded = Slitherlink(6, 6)
+    overloaded.state_of_grid = [row[:] for row in
+                                number_test_grid.state_of_grid]
+    overloaded.change_number(5, 3, 1)
+    with pytest.raises(CellValueOverload, match="5, 3"):
+        overloaded.check_all_numbers()